@@ -1,9 +1,12 @@
 import streamlit as st
-import io
-import zipfile
+import os
+import tempfile
 from datetime import datetime
 from generator.site_builder import SiteBuilder
-from generator.sanitizer import clean_html, clean_iframe, validate_url
+from generator.instrumentation import MemoryCollector
+from generator.context import context_fingerprint
+from generator.feed_cache import DEFAULT_TTL
+from generator.sanitizer import validate_url
 
 # --- 1. APP CONFIGURATION ---
 st.set_page_config(
@@ -139,6 +142,10 @@ with tabs[3]:
     st.info("Publish your Google Sheet as CSV and paste link below (CORS required for preview).")
     sheet_url = st.text_input("Published CSV Link (CSV or pipe-delimited)", "")
     st.warning("CSV columns accepted: Name | Price | Description | Img1 | Img2 | Img3 (delimiter auto-detected)")
+    home_products = st.number_input("Products shown on the home page", min_value=1, max_value=200, value=12)
+    products_per_page = st.number_input("Products per inventory page", min_value=6, max_value=500, value=48)
+    product_pages = st.checkbox("Generate a page per product", value=False)
+    product_search = st.checkbox("Add product search to the exported site", value=False)
 
 with tabs[4]:
     st.header("🌟 Trust & Social Proof")
@@ -150,9 +157,7 @@ with tabs[5]:
     priv_body = st.text_area("Full Privacy Policy Content", height=200)
     terms_body = st.text_area("Full Terms & Conditions Content", height=200)
 
-# Sanitize values
-map_iframe = clean_iframe(map_iframe_raw)
-about_txt_clean = clean_html(about_txt)
+# Normalize list inputs (HTML fields are sanitized by SiteBuilder.prepare)
 service_list = [s.strip() for s in (biz_serv_text or "").splitlines() if s.strip()]
 area_list = [a.strip() for a in (biz_areas or "").split(",") if a.strip()]
 
@@ -174,11 +179,15 @@ context = {
     "seo_d": seo_d or "",
     "biz_key": biz_key or "",
     "biz_serv": service_list,
-    "about_txt": about_txt_clean,
+    "about_txt": about_txt or "",
     "custom_hero": custom_hero or "",
     "custom_feat": custom_feat or "",
     "custom_gall": custom_gall or "",
     "sheet_url": sheet_url or "",
+    "home_products": int(home_products),
+    "products_per_page": int(products_per_page),
+    "product_pages": product_pages,
+    "product_search": product_search,
     "testi_raw": testi_raw or "",
     "faq_raw": faq_raw or "",
     "priv_body": priv_body or "",
@@ -192,11 +201,38 @@ context = {
     "ls": ls,
     "layout_dna": layout_dna,
     "gsc_tag_input": gsc_tag_input,
-    "map_iframe": map_iframe or "",
+    "map_iframe": map_iframe_raw or "",
 }
 
 # --- Build preview and zip ---
-builder = SiteBuilder()
+# Reruns triggered by unrelated widgets (e.g. the device radio) must not re-sanitize,
+# re-fetch or re-render: the builder is a shared resource and both the prepared
+# context and the preview HTML are cached by content hash.
+
+
+@st.cache_resource
+def get_builder() -> SiteBuilder:
+    return SiteBuilder()
+
+
+# Expires with the feed cache TTL so sheet edits still reach the preview
+@st.cache_resource(ttl=DEFAULT_TTL, max_entries=16, show_spinner=False)
+def prepare_context(context_key: str, _context: dict):
+    """(prepared context, sanitize/feed.fetch stage rows timed when it was built)"""
+    shared = get_builder()
+    stats = MemoryCollector()
+    prepared = SiteBuilder(feed_cache=shared.feed_cache, template_env=shared.env, collector=stats).prepare(_context)
+    return prepared, stats.summary()
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_preview(prepared_digest: str, _prepared) -> str:
+    return get_builder().render_home(_prepared, is_home=True)
+
+
+builder = get_builder()
+# Sanitize and fetch the product sheet once; reused by the preview and the export
+prepared, prepare_stats = prepare_context(context_fingerprint(context), context)
 
 # Device preview selector
 st.markdown("### Preview")
@@ -205,16 +241,53 @@ with cols[0]:
     device = st.radio("Device", ["Desktop", "Tablet", "Mobile"], horizontal=False)
 with cols[1]:
     # render preview HTML live (Streamlit reruns on change so preview always reflects state)
-    preview_html = builder.render_home(context, is_home=True)
+    preview_html = render_preview(prepared.digest, prepared)
     height_map = {"Desktop": 800, "Tablet": 700, "Mobile": 600}
     st.components.v1.html(preview_html, height=height_map.get(device, 800), scrolling=True)
 
+if prepared.get("feed_errors"):
+    with st.expander(f"⚠️ Product sheet: {len(prepared['feed_errors'])} issue(s)"):
+        st.code("\n".join(prepared["feed_errors"]), language=None)
+
 # Export ZIP
+shared_assets = st.checkbox("Shared stylesheet + on-demand legal pages (smaller pages, better caching)", value=False)
 if st.button("🚀 DEPLOY & DOWNLOAD THE WORLD'S BEST BUSINESS ASSET"):
-    z_b = io.BytesIO()
-    builder.build_zip(context, z_b)
-    z_b.seek(0)
     filename = f"{(biz_name or 'site').lower().replace(' ', '_')}_final.zip"
-    st.download_button("📥 DOWNLOAD PLATINUM ASSET", z_b, file_name=filename)
+    # Per-export collector (the shared builder serves every session)
+    build_stats = MemoryCollector()
+    export_builder = SiteBuilder(feed_cache=builder.feed_cache, template_env=builder.env, collector=build_stats)
+    # Stream the archive to a temp file instead of holding a second copy in a BytesIO
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_path = os.path.join(tmp_dir, "site.zip")
+        with open(zip_path, "wb") as fh:
+            export_builder.export(prepared, fh, shared_assets=shared_assets)
+        # prepared was sanitized/fetched earlier (and is cached); report those stages too
+        st.session_state["last_build_stats"] = prepare_stats + build_stats.summary()
+        # Hand Streamlit the open file, not bytes we read ourselves. Streamlit still
+        # reads it into its in-memory media store to serve the download, so one copy
+        # of the archive stays in memory for the session; export() itself does not
+        # buffer it.
+        with open(zip_path, "rb") as fh:
+            st.download_button("📥 DOWNLOAD PLATINUM ASSET", fh, file_name=filename, mime="application/zip")
+
+with st.sidebar:
+    with st.expander("⏱️ Last Build Breakdown"):
+        stats = st.session_state.get("last_build_stats")
+        if stats:
+            st.table(
+                [
+                    {
+                        "Stage": row["stage"],
+                        "Calls": row["count"],
+                        "ms": round(row["seconds"] * 1000, 2),
+                        "Bytes in": row.get("bytes_in", ""),
+                        "Bytes out": row.get("bytes_out", ""),
+                    }
+                    for row in stats
+                ]
+            )
+            st.caption("sanitize and feed.fetch were timed when these inputs were first prepared; reruns reuse that result.")
+        else:
+            st.caption("Export a site to see where the time goes.")
 
 st.caption("Auto-saved at: " + datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ"))
@@ -0,0 +1,252 @@
+import io
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import statistics
+import subprocess
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from generator.feed import FeedReader
+from generator.feed_cache import ProductFeedCache
+from generator.sanitizer import Sanitizer, clean_html
+from generator.site_builder import SiteBuilder
+
+# Offline benchmark suite for the generator hot paths.
+#
+#   python -m benchmarks.run -o bench_results.json
+#   python -m benchmarks.run --compare bench_results.json
+#
+# Catalog CSVs are synthetic and served by a local stub HTTP server, so no network
+# access is needed. Each case records wall time (min/median over --repeat runs) and
+# the peak traced memory of one extra run. --compare exits non-zero when a case got
+# slower than the baseline by more than --threshold.
+
+DEFAULT_SIZES = (10, 1000, 10000, 50000)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.15
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Cold imports a short-lived worker pays before it can render
+IMPORT_CASES = ("generator", "generator.site_builder")
+
+
+# --- synthetic inputs ---
+def make_catalog_csv(n: int) -> bytes:
+    lines = ["Name|Price|Description|Img1|Img2|Img3"]
+    for i in range(n):
+        lines.append(
+            f"Product {i}|₹{1000 + i}|Hand-finished item number {i} with <b>bold</b> details & care notes"
+            f"|https://images.example.com/p/{i}-a.jpg|https://images.example.com/p/{i}-b.jpg|"
+        )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def make_context(sheet_url: str = "") -> dict:
+    legal = "\n".join(f"<p>Clause {i}: we process <b>personal data</b> only as described & required by law.</p>" for i in range(200))
+    return {
+        "biz_name": "Bench & Co",
+        "biz_phone": "+91 84540 02711",
+        "biz_email": "hello@example.com",
+        "biz_cat": "Luxury Wedding Planner",
+        "biz_addr": "12 Market Road, New Delhi",
+        "prod_url": "https://example.github.io/site/",
+        "hero_h": "Crafting Dream Weddings",
+        "seo_d": "Verified 2026 AI-Ready Industrial Assets.",
+        "biz_serv": [f"Service {i}" for i in range(40)],
+        "about_txt": "<p>" + "Our story. " * 400 + "</p>",
+        "priv_body": legal,
+        "terms_body": legal,
+        "sheet_url": sheet_url,
+        "map_iframe": '<iframe src="https://www.google.com/maps/embed?pb=1"></iframe>',
+        "layout_dna": "Industrial Titan",
+    }
+
+
+class StubServer:
+    """Serves /catalog-<n>.csv from memory on 127.0.0.1."""
+
+    def __init__(self):
+        catalogs = {}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    n = int(self.path.split("catalog-", 1)[1].split(".csv", 1)[0])
+                except (IndexError, ValueError):
+                    self.send_error(404)
+                    return
+                body = catalogs.get(n)
+                if body is None:
+                    body = catalogs[n] = make_catalog_csv(n)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, n: int) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/catalog-{n}.csv"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# --- measurement ---
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm-up (imports, template compilation, caches that are meant to be warm)
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    median = statistics.median(times)
+    return {
+        "runs": repeat,
+        "min_s": round(min(times), 6),
+        "median_s": round(median, 6),
+        "ops_per_s": round(1 / median, 3) if median else None,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    """Cold import cost of module (cumulative -X importtime) in fresh interpreters."""
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, capture_output=True, text=True, check=True)
+        # "import time: <self us> | <cumulative us> | <name>"; the top-level entry is unindented
+        for line in out.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module and not parts[2].startswith("  "):
+                times.append(int(parts[1]) / 1e6)
+    median = statistics.median(times)
+    return {"runs": repeat, "min_s": round(min(times), 6), "median_s": round(median, 6)}
+
+
+def fresh_feed_builder(reader: FeedReader) -> SiteBuilder:
+    # ttl=0 and a new cache every call: always a full download + parse
+    return SiteBuilder(feed_cache=ProductFeedCache(ttl=0), feed_reader=reader)
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat: int = DEFAULT_REPEAT, log=None) -> dict:
+    results = {}
+
+    def record(name, fn):
+        results[name] = measure(fn, repeat)
+        if log is not None:
+            r = results[name]
+            log(f"{name:<32} median {r['median_s'] * 1000:10.2f} ms   peak {r['peak_kb']:10.1f} KiB")
+
+    for module in IMPORT_CASES:
+        name = f"import[{module}]"
+        results[name] = measure_import(module, repeat)
+        if log is not None:
+            log(f"{name:<32} median {results[name]['median_s'] * 1000:10.2f} ms")
+
+    # Feed limits must not cut the largest synthetic catalog short
+    reader = FeedReader(max_rows=max(sizes, default=0) + 1, max_bytes=None)
+    ctx = make_context()
+    builder = SiteBuilder()
+    record("clean_html[legal]", lambda: clean_html(ctx["priv_body"]))
+    # cache_size=0: measures the reused cleaner + plain-text fast path, not LRU hits
+    uncached = Sanitizer(cache_size=0)
+    record("clean_html[legal,uncached]", lambda: uncached.clean(ctx["priv_body"]))
+    record("clean_many[services]", lambda: uncached.clean_many(ctx["biz_serv"]))
+    record("sanitize_context", lambda: builder._sanitize_context(ctx))
+    prepared = builder.prepare(ctx)
+    record("render_home[0]", lambda: builder.render_home(prepared))
+
+    with StubServer() as server:
+        for n in sizes:
+            url = server.url(n)
+            record(f"fetch_products[{n}]", lambda: fresh_feed_builder(reader)._fetch_products_from_sheet(url))
+
+            # Remaining cases use a warm feed cache so they time rendering/export only
+            warm = SiteBuilder(feed_cache=ProductFeedCache(ttl=3600), feed_reader=reader)
+            sheet_ctx = make_context(url)
+            prepared = warm.prepare(sheet_ctx)
+            record(f"render_home[{n}]", lambda: warm.render_home(prepared))
+            record(f"build_zip[{n}]", lambda: warm.build_zip(sheet_ctx, io.BytesIO()))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "repeat": repeat,
+            "sizes": list(sizes),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD):
+    """Return (rows, regressions) comparing median times case by case."""
+    rows = []
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_s"):
+            rows.append((name, None, cur["median_s"], None))
+            continue
+        change = cur["median_s"] / base["median_s"] - 1
+        rows.append((name, base["median_s"], cur["median_s"], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Offline benchmarks for the site generator.")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="where to write results (JSON)")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES), help="comma-separated catalog sizes")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown before failing (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    current = run_suite(sizes, args.repeat, log=lambda line: print(line, file=sys.stderr))
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(current, fh, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, "r", encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    rows, regressions = compare(current, baseline, args.threshold)
+    for name, base, cur, change in rows:
+        if change is None:
+            print(f"{name:<32} {'-':>12} {cur * 1000:12.2f} ms   (new)")
+        else:
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:<32} {base * 1000:12.2f} {cur * 1000:12.2f} ms {change:+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
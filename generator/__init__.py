@@ -1,4 +1,28 @@
 # Generator package
-from .site_builder import SiteBuilder
+#
+# Names are resolved on first access (PEP 562) so "import generator" stays cheap;
+# submodules then import only what they use (the render core needs Jinja and the
+# sanitizer; network, imaging and optional compression modules load on demand).
 
-__all__ = ["SiteBuilder"]
+__all__ = ["SiteBuilder", "PreparedContext", "context_fingerprint"]
+
+_EXPORTS = {
+    "SiteBuilder": ".site_builder",
+    "PreparedContext": ".context",
+    "context_fingerprint": ".context",
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,24 +1,163 @@
 import os
 import io
-import requests
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
+from .fetch import get_default_client
 
-# Simple helper: download remote image and optionally resize/save as webp.
-# This module is optional; used for improving export (not mandatory).
+# Image bundling for exports.
+# AssetBundler: optional build_zip stage that fetches every referenced image
+# concurrently, produces several webp widths for srcset and caches the encoded
+# files on disk keyed by URL + transform parameters, so repeat builds skip both the
+# download and the Pillow re-encode.
 
-def fetch_image_to_bytes(url: str, max_size=(1600, 1600)):
+DEFAULT_WIDTHS = (480, 960, 1600)
+WEBP_QUALITY = 80
+ASSET_PREFIX = "assets/img"
+# Context fields holding image URLs (product images are handled separately)
+IMAGE_FIELDS = ("custom_hero", "custom_feat", "custom_gall")
+
+
+class BundledImage:
+    """
+    Local copies of one remote image.
+    files: list of (width, archive_name, source) ordered by width, where source is
+    bytes or a path into the bundler's cache directory.
+    """
+
+    __slots__ = ("url", "files")
+
+    def __init__(self, url: str, files: list):
+        self.url = url
+        self.files = files
+
+    @property
+    def src(self) -> str:
+        """Largest variant, used as the plain src fallback."""
+        return self.files[-1][1]
+
+    @property
+    def srcset(self) -> str:
+        return ", ".join(f"{name} {width}w" for width, name, _ in self.files)
+
+
+class AssetBundler:
     """
-    Download image and return bytes. If large, resize to max_size.
-    Returns bytes or None if failed.
+    Fetch and transform images concurrently.
+    cache_dir: where encoded variants are kept between builds (None = no disk cache).
+    client: generator.fetch.HttpClient (default: the shared client).
     """
-    try:
-        resp = requests.get(url, timeout=8)
-        resp.raise_for_status()
-        img = Image.open(io.BytesIO(resp.content)).convert("RGB")
-        img.thumbnail(max_size)
-        out = io.BytesIO()
-        img.save(out, format="WEBP", quality=80)
-        out.seek(0)
-        return out.read()
-    except Exception:
-        return None
+
+    # Context fields rewritten to local files by SiteBuilder
+    fields = IMAGE_FIELDS
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        widths=DEFAULT_WIDTHS,
+        quality: int = WEBP_QUALITY,
+        max_workers: int = 8,
+        timeout: float = 8,
+        prefix: str = ASSET_PREFIX,
+        client=None,
+    ):
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(set(int(w) for w in widths)))
+        self.quality = quality
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.prefix = prefix.rstrip("/")
+        self.client = client
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def bundle(self, urls) -> dict:
+        """
+        Return {url: BundledImage} for every URL that could be fetched and decoded.
+        Failed images are left out so callers can keep hotlinking them.
+        """
+        # dict keeps first-seen order with O(1) membership (catalogs can list 20k images)
+        unique = [url for url in dict.fromkeys(urls) if url and url.startswith(("http://", "https://"))]
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique))) as pool:
+            results = pool.map(self._process, unique)
+            return {url: img for url, img in zip(unique, results) if img is not None}
+
+    def cache_key(self, url: str) -> str:
+        params = json.dumps({"url": url, "widths": self.widths, "quality": self.quality, "format": "webp"}, sort_keys=True)
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()[:20]
+
+    def _process(self, url: str):
+        key = self.cache_key(url)
+        cached = self._load_cached(url, key)
+        if cached is not None:
+            return cached
+        try:
+            client = self.client or get_default_client()
+            variants = self._encode(client.get_bytes(url, timeout=self.timeout))
+        except Exception:
+            return None
+        files = []
+        for width, data in variants:
+            name = f"{self.prefix}/{key}-{width}.webp"
+            files.append((width, name, self._save(key, width, data) or data))
+        if self.cache_dir:
+            self._write_index(key, [w for w, _ in variants])
+        return BundledImage(url, files)
+
+    def _encode(self, content: bytes) -> list:
+        img = Image.open(io.BytesIO(content))
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        # Never upscale: widths above the original collapse into one original-size variant
+        widths = [w for w in self.widths if w < img.width] + [min(img.width, self.widths[-1])]
+        variants = []
+        for width in sorted(set(widths)):
+            if width == img.width:
+                resized = img
+            else:
+                resized = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, format="WEBP", quality=self.quality)
+            variants.append((width, out.getvalue()))
+        return variants
+
+    # --- disk cache ---
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}-{suffix}")
+
+    def _save(self, key: str, width: int, data: bytes):
+        if not self.cache_dir:
+            return None
+        path = self._path(key, f"{width}.webp")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        return path
+
+    def _write_index(self, key: str, widths: list):
+        # Written last: its presence means every variant is on disk
+        path = self._path(key, "index.json")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"widths": widths}, fh)
+        os.replace(tmp, path)
+
+    def _load_cached(self, url: str, key: str):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key, "index.json"), "r", encoding="utf-8") as fh:
+                widths = json.load(fh)["widths"]
+        except (OSError, ValueError, KeyError):
+            return None
+        files = []
+        for width in widths:
+            path = self._path(key, f"{width}.webp")
+            if not os.path.exists(path):
+                return None
+            files.append((width, f"{self.prefix}/{key}-{width}.webp", path))
+        return BundledImage(url, files) if files else None
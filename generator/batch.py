@@ -0,0 +1,338 @@
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import traceback
+from .context import context_fingerprint
+from .sanitizer import sanitize_filename
+
+# Headless batch builds: read a JSONL/CSV file of site contexts and build one ZIP per
+# job across a pool of worker processes.
+#
+#   python -m generator.batch jobs.jsonl -o out/ -j 8
+#
+# Each finished job is appended to a JSONL report (out/report.jsonl by default), so an
+# interrupted or partially failed run can be resumed: jobs already reported "ok" whose
+# ZIP still exists and whose context and build options are unchanged (same
+# fingerprint in the report) are skipped.
+#
+# With --directories each job is exported incrementally into out/<job_id>/ instead
+# (see generator.incremental); every job runs, but only changed files are written.
+
+JOB_ID_KEYS = ("job_id", "id")
+# CSV cells for list fields use the same conventions as the Streamlit inputs
+LIST_FIELDS = {"biz_serv": "\n", "area_list": ","}
+REPORT_NAME = "report.jsonl"
+
+
+def load_jobs(path: str):
+    """
+    Read jobs from a .jsonl or .csv file.
+    Returns a list of (job_id, context) tuples. Jobs without an explicit
+    job_id/id column are numbered by position (job-00001, ...).
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as fh:
+            records = [_csv_record(row) for row in csv.DictReader(fh)]
+    else:
+        records = []
+        with open(path, "r", encoding="utf-8") as fh:
+            for line_no, line in enumerate(fh, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    raise ValueError(f"{path}:{line_no}: invalid JSON ({exc})") from None
+                if not isinstance(record, dict):
+                    raise ValueError(f"{path}:{line_no}: expected a JSON object")
+                records.append(record)
+
+    jobs = []
+    seen = set()
+    for n, record in enumerate(records, 1):
+        context = dict(record)
+        job_id = None
+        for key in JOB_ID_KEYS:
+            if context.get(key) not in (None, ""):
+                job_id = str(context.pop(key))
+                break
+        job_id = job_id or f"job-{n:05d}"
+        # Ids map to output names; "a b" and "a_b" would overwrite each other's ZIP
+        out_name = sanitize_filename(job_id)
+        if out_name in seen:
+            raise ValueError(f"duplicate job id: {job_id} (output name {out_name})")
+        seen.add(out_name)
+        jobs.append((job_id, context))
+    return jobs
+
+
+def _csv_record(row: dict) -> dict:
+    out = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = key.strip()
+        value = value or ""
+        if key in LIST_FIELDS:
+            out[key] = [v.strip() for v in value.split(LIST_FIELDS[key]) if v.strip()]
+        else:
+            out[key] = value
+    return out
+
+
+def load_report(report_path: str) -> dict:
+    """Return the latest result per job_id from a JSONL report (empty if missing)."""
+    results = {}
+    try:
+        with open(report_path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted run
+                    continue
+                if isinstance(result, dict) and "job_id" in result:
+                    results[result["job_id"]] = result
+    except OSError:
+        pass
+    return results
+
+
+# --- worker side ---
+_worker_builder = None
+_worker_bundler = None
+_worker_collector = None
+_worker_options = {}
+
+
+def _init_worker(feed_cache_dir=None, template_cache_dir=None, asset_cache_dir=None, optimize=False, shared_assets=False):
+    global _worker_builder, _worker_bundler, _worker_collector, _worker_options
+    from .site_builder import SiteBuilder
+    from .feed_cache import ProductFeedCache
+    from .templating import create_environment
+    from .instrumentation import MemoryCollector
+
+    # Workers share fetched sheets through the on-disk feed cache
+    feed_cache = ProductFeedCache(cache_dir=feed_cache_dir) if feed_cache_dir else None
+    # ... and parsed templates through the bytecode cache; templates don't change mid-run
+    template_env = create_environment(bytecode_cache_dir=template_cache_dir, auto_reload=False) if template_cache_dir else None
+    _worker_collector = MemoryCollector()
+    _worker_builder = SiteBuilder(feed_cache=feed_cache, template_env=template_env, collector=_worker_collector)
+    if asset_cache_dir:
+        from .assets import AssetBundler
+
+        # Images are bundled into the ZIPs; encoded variants are shared across workers and runs
+        _worker_bundler = AssetBundler(cache_dir=asset_cache_dir)
+    else:
+        _worker_bundler = None
+    _worker_options = {"minify": True, "precompress": True} if optimize else {}
+    if shared_assets:
+        _worker_options["shared_assets"] = True
+
+
+def build_job(job_id: str, context: dict, out_dir: str, directories: bool = False) -> dict:
+    """Build one site ZIP (or site directory) into out_dir and return its result record."""
+    if _worker_builder is None:
+        _init_worker()
+    if directories:
+        return _build_job_dir(job_id, context, out_dir)
+    path = os.path.join(out_dir, sanitize_filename(job_id) + ".zip")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    _worker_collector.reset()
+    started = time.perf_counter()
+    try:
+        with open(tmp, "wb") as fh:
+            _worker_builder.build_zip(context, fh, bundler=_worker_bundler, **_worker_options)
+        os.replace(tmp, path)
+    except Exception as exc:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return {
+            "job_id": job_id,
+            "status": "error",
+            "seconds": round(time.perf_counter() - started, 4),
+            "error": f"{type(exc).__name__}: {exc}",
+            "traceback": traceback.format_exc(),
+            "stages": _job_stages(),
+        }
+    return {
+        "job_id": job_id,
+        "status": "ok",
+        "path": path,
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 4),
+        "stages": _job_stages(),
+    }
+
+
+def _build_job_dir(job_id: str, context: dict, out_dir: str) -> dict:
+    path = os.path.join(out_dir, sanitize_filename(job_id))
+    _worker_collector.reset()
+    started = time.perf_counter()
+    try:
+        report = _worker_builder.export_dir(context, path, bundler=_worker_bundler, **_worker_options)
+    except Exception as exc:
+        return {
+            "job_id": job_id,
+            "status": "error",
+            "seconds": round(time.perf_counter() - started, 4),
+            "error": f"{type(exc).__name__}: {exc}",
+            "traceback": traceback.format_exc(),
+            "stages": _job_stages(),
+        }
+    return {
+        "job_id": job_id,
+        "status": "ok",
+        "path": path,
+        "written": len(report.written),
+        "unchanged": len(report.unchanged),
+        "removed": len(report.removed),
+        "seconds": round(time.perf_counter() - started, 4),
+        "stages": _job_stages(),
+    }
+
+
+def _job_stages() -> dict:
+    # Per-entry archive timings are folded into "export" to keep report lines small
+    return {stage: seconds for stage, seconds in _worker_collector.totals().items() if not stage.startswith("archive:")}
+
+
+# --- driver side ---
+def run_batch(
+    input_path: str,
+    out_dir: str,
+    workers: int = None,
+    resume: bool = True,
+    report_path: str = None,
+    feed_cache_dir: str = None,
+    template_cache_dir: str = None,
+    asset_cache_dir: str = None,
+    optimize: bool = False,
+    directories: bool = False,
+    shared_assets: bool = False,
+    on_result=None,
+) -> list:
+    """
+    Build every job in input_path into out_dir and return the list of results
+    (including skipped jobs when resuming). workers=1 builds in-process.
+    directories=True exports each job incrementally into out_dir/<job_id>/; resume
+    skipping is then left to the per-directory manifests.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    report_path = report_path or os.path.join(out_dir, REPORT_NAME)
+    jobs = load_jobs(input_path)
+
+    previous = load_report(report_path) if resume and not directories else {}
+    options = {"optimize": optimize, "shared_assets": shared_assets, "bundle_images": bool(asset_cache_dir)}
+    fingerprints = {job_id: context_fingerprint({"context": context, "options": options}) for job_id, context in jobs}
+    results = []
+    pending = []
+    for job_id, context in jobs:
+        prev = previous.get(job_id)
+        if (
+            prev
+            and prev.get("status") == "ok"
+            and prev.get("fingerprint") == fingerprints[job_id]
+            and os.path.exists(prev.get("path", ""))
+        ):
+            results.append(dict(prev, status="skipped"))
+        else:
+            pending.append((job_id, context))
+
+    mode = "a" if resume else "w"
+    with open(report_path, mode, encoding="utf-8") as report:
+
+        def record(result):
+            result["fingerprint"] = fingerprints[result["job_id"]]
+            report.write(json.dumps(result) + "\n")
+            report.flush()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(pending) <= 1:
+            _init_worker(feed_cache_dir, template_cache_dir, asset_cache_dir, optimize, shared_assets)
+            for job_id, context in pending:
+                record(build_job(job_id, context, out_dir, directories))
+        else:
+            # Driver only; spawned workers import this module and shouldn't pay for it
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(feed_cache_dir, template_cache_dir, asset_cache_dir, optimize, shared_assets)) as pool:
+                futures = {pool.submit(build_job, job_id, context, out_dir, directories): job_id for job_id, context in pending}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        # e.g. a worker process died; the job can be resumed later
+                        result = {"job_id": futures[future], "status": "error", "seconds": None, "error": f"{type(exc).__name__}: {exc}"}
+                    record(result)
+
+    return results
+
+
+def summarize(results: list) -> dict:
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    timings = [r["seconds"] for r in results if r["status"] == "ok" and r.get("seconds") is not None]
+    return {
+        "jobs": len(results),
+        "counts": counts,
+        "build_seconds": round(sum(timings), 4),
+        "max_seconds": max(timings) if timings else 0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m generator.batch", description="Build site ZIPs from a JSONL/CSV file of contexts.")
+    parser.add_argument("input", help="jobs file (.jsonl or .csv)")
+    parser.add_argument("-o", "--out", required=True, help="output directory for ZIPs and the report")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--report", default=None, help=f"report path (default: <out>/{REPORT_NAME})")
+    parser.add_argument("--no-resume", action="store_true", help="rebuild every job and overwrite the report")
+    parser.add_argument("--feed-cache-dir", default=None, help="share fetched product sheets between workers")
+    parser.add_argument("--template-cache-dir", default=None, help="persistent Jinja bytecode cache directory")
+    parser.add_argument("--asset-cache-dir", default=None, help="bundle images into the ZIPs, caching encoded variants here")
+    parser.add_argument("--optimize", action="store_true", help="minify HTML/CSS/JS and add .gz/.br siblings")
+    parser.add_argument("--shared-assets", action="store_true", help="link one styles.<hash>.css and load legal text on demand")
+    parser.add_argument("--directories", action="store_true", help="export into <out>/<job_id>/ incrementally instead of ZIPs")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    def progress(result):
+        line = f"[{result['status']}] {result['job_id']}"
+        if result.get("error"):
+            line += f": {result['error']}"
+        print(line, file=sys.stderr)
+
+    results = run_batch(
+        args.input,
+        args.out,
+        workers=args.workers,
+        resume=not args.no_resume,
+        report_path=args.report,
+        feed_cache_dir=args.feed_cache_dir,
+        template_cache_dir=args.template_cache_dir,
+        asset_cache_dir=args.asset_cache_dir,
+        optimize=args.optimize,
+        directories=args.directories,
+        shared_assets=args.shared_assets,
+        on_result=progress,
+    )
+    summary = summarize(results)
+    summary["wall_seconds"] = round(time.perf_counter() - started, 4)
+    print(json.dumps(summary))
+    return 1 if summary["counts"].get("error") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
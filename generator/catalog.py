@@ -0,0 +1,95 @@
+import re
+
+# How products are spread over exported pages.
+#
+#   index.html                       first `home_products` products
+#   inventory.html, inventory-2.html  every product, `products_per_page` per page
+#                                     (only when the home page can't show them all)
+#   product-<slug>.html               one page per product when `product_pages` is set
+#
+# All pages sit at the site root so relative links and bundled asset paths keep working.
+# The three settings are read from the context; these are the defaults.
+
+HOME_PRODUCTS = 12
+PRODUCTS_PER_PAGE = 48
+MAX_SLUG_LENGTH = 80
+
+
+def product_slug(name: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", (name or "").lower()).strip("-")
+    return slug[:MAX_SLUG_LENGTH].rstrip("-") or "item"
+
+
+def inventory_href(page: int) -> str:
+    return "inventory.html" if page == 1 else f"inventory-{page}.html"
+
+
+def _int_option(ctx, key: str, default: int) -> int:
+    value = ctx.get(key)
+    if value is None or value == "":
+        return default
+    try:
+        # 0 is a real setting (e.g. home_products=0: no products on the home page)
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+class CatalogLayout:
+    """Page assignment for a prepared context's products (see module comment)."""
+
+    __slots__ = ("products", "home", "per_page", "pages", "links")
+
+    def __init__(self, ctx):
+        self.products = ctx.get("products") or ()
+        self.home = _int_option(ctx, "home_products", HOME_PRODUCTS)
+        self.per_page = max(1, _int_option(ctx, "products_per_page", PRODUCTS_PER_PAGE))
+        count = len(self.products)
+        self.pages = -(-count // self.per_page) if count > self.home else 0
+        self.links = self._detail_links() if ctx.get("product_pages") else None
+
+    def _detail_links(self) -> tuple:
+        counts = {}
+        used = set()
+        links = []
+        for product in self.products:
+            slug = product_slug(product.name)
+            # Duplicate names get -2, -3, ... in feed order, so links stay stable; skip
+            # suffixes already taken by another name ("Rose", "Rose", "Rose 2")
+            n = counts.get(slug, 0) + 1
+            name = f"product-{slug}.html" if n == 1 else f"product-{slug}-{n}.html"
+            while name in used:
+                n += 1
+                name = f"product-{slug}-{n}.html"
+            counts[slug] = n
+            used.add(name)
+            links.append(name)
+        return tuple(links)
+
+    def page_vars(self, start: int, stop: int) -> dict:
+        return {
+            "page_products": self.products[start:stop],
+            "page_links": self.links[start:stop] if self.links else None,
+            "product_count": len(self.products),
+            "inventory_pages": self.pages,
+            "inventory_href": inventory_href,
+        }
+
+    def home_vars(self) -> dict:
+        return self.page_vars(0, self.home if self.pages else len(self.products))
+
+    def inventory_vars(self, page: int) -> dict:
+        start = (page - 1) * self.per_page
+        out = self.page_vars(start, start + self.per_page)
+        out.update(page=page, pages=self.pages, page_title="Inventory" if page == 1 else f"Inventory - Page {page}", canonical_path=inventory_href(page))
+        return out
+
+    def back_href(self, index: int) -> str:
+        return inventory_href(index // self.per_page + 1) if self.pages else "index.html"
+
+    def page_paths(self) -> list:
+        """Site-relative paths of the catalog pages, for the sitemap."""
+        paths = [inventory_href(n) for n in range(1, self.pages + 1)]
+        if self.links:
+            paths.extend(self.links)
+        return paths
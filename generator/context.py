@@ -0,0 +1,90 @@
+import json
+import hashlib
+from collections.abc import Mapping
+from types import MappingProxyType
+
+# A sanitized, resolved template context that can be shared by any number of page
+# renders and exports. Build one with SiteBuilder.prepare(context); constructing it
+# directly skips sanitization.
+
+
+def _freeze(value):
+    if isinstance(value, PreparedContext):
+        return value
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, (tuple, list)):
+        return [_thaw(v) for v in value]
+    if isinstance(value, frozenset):
+        return sorted((_thaw(v) for v in value), key=repr)
+    return value
+
+
+def _json_default(value):
+    # Records such as feed.Product serialize through to_dict()
+    to_dict = getattr(value, "to_dict", None)
+    return to_dict() if callable(to_dict) else str(value)
+
+
+def context_fingerprint(context: Mapping) -> str:
+    """Hex SHA-256 of a raw (unsanitized) context; usable as a cache key."""
+    payload = json.dumps(_thaw(context), sort_keys=True, separators=(",", ":"), default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PreparedContext(Mapping):
+    """
+    Immutable, hashable mapping of template variables.
+    Nested dicts are exposed read-only and lists become tuples, so templates see the
+    same values as with a plain dict. Equality and hashing use a content digest.
+    """
+
+    __slots__ = ("_data", "_digest")
+
+    def __init__(self, data: Mapping):
+        object.__setattr__(self, "_data", {k: _freeze(v) for k, v in data.items()})
+        object.__setattr__(self, "_digest", None)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PreparedContext is immutable")
+
+    @property
+    def digest(self) -> str:
+        """Hex SHA-256 of the canonical JSON form of the context."""
+        if self._digest is None:
+            object.__setattr__(self, "_digest", context_fingerprint(self._data))
+        return self._digest
+
+    def to_dict(self) -> dict:
+        """Return a mutable deep copy (plain dicts and lists)."""
+        return _thaw(self._data)
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __eq__(self, other):
+        if isinstance(other, PreparedContext):
+            return self.digest == other.digest
+        return NotImplemented
+
+    def __repr__(self):
+        return f"PreparedContext(digest={self.digest[:12]!r}, keys={len(self._data)})"
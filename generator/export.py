@@ -0,0 +1,120 @@
+import os
+import time
+import zipfile
+
+# Streaming ZIP export.
+# Entries are written to any writable sink (file, pipe, HTTP response) as they are
+# produced; the sink does not need to be seekable. Page bodies may be iterables of
+# str/bytes chunks (e.g. Template.generate()) so a page never has to exist as one
+# string. Timestamps and file attributes are fixed so identical inputs produce
+# byte-identical archives.
+
+# Zip's epoch; overridden by SOURCE_DATE_EPOCH when set (reproducible-builds convention)
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# Already-compressed formats gain nothing from deflate
+STORED_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".avif", ".woff", ".woff2", ".gz", ".br", ".zip")
+DEFAULT_COMPRESSLEVEL = 6
+CHUNK_SIZE = 64 * 1024
+
+
+class ArchiveEntry:
+    """
+    One file in an exported archive.
+    data: bytes, str, an iterable of str/bytes chunks, or a zero-argument callable
+    returning one of those (called only when the entry is actually written).
+    compress_type/compresslevel: None picks the default for the file name.
+    fingerprint: optional hash of everything the content depends on; lets
+    incremental builds skip producing unchanged entries.
+    """
+
+    __slots__ = ("name", "data", "compress_type", "compresslevel", "fingerprint")
+
+    def __init__(self, name: str, data, compress_type: int = None, compresslevel: int = None, fingerprint: str = None):
+        self.name = name
+        self.data = data
+        self.compress_type = compress_type
+        self.compresslevel = compresslevel
+        self.fingerprint = fingerprint
+
+
+def default_date_time():
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch:
+        try:
+            return time.gmtime(max(int(epoch), 315532800))[:6]
+        except ValueError:
+            pass
+    return FIXED_DATE_TIME
+
+
+def compression_for(name: str) -> int:
+    return zipfile.ZIP_STORED if name.lower().endswith(STORED_SUFFIXES) else zipfile.ZIP_DEFLATED
+
+
+def _set_compresslevel(info: zipfile.ZipInfo, level: int):
+    # Public attribute since Python 3.13, private before
+    if hasattr(zipfile.ZipInfo, "compress_level"):
+        info.compress_level = level
+    else:
+        info._compresslevel = level
+
+
+def file_chunks(path: str, chunk_size: int = CHUNK_SIZE):
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def iter_chunks(data):
+    """Yield bytes chunks for an entry body."""
+    if callable(data):
+        data = data()
+    if data is None:
+        return
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        yield bytes(data)
+        return
+    if isinstance(data, str):
+        yield data.encode("utf-8")
+        return
+    for chunk in data:
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else bytes(chunk)
+
+
+def write_archive(entries, sink, compresslevel: int = DEFAULT_COMPRESSLEVEL, date_time=None, on_entry=None) -> int:
+    """
+    Stream entries into a ZIP written to sink.
+    compresslevel applies to deflated entries that don't set their own.
+    on_entry(name, seconds, bytes_in, bytes_out) is called after each entry.
+    Returns the number of entries written.
+    """
+    date_time = date_time or default_date_time()
+    count = 0
+    with zipfile.ZipFile(sink, "w") as zf:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.name, date_time=date_time)
+            info.compress_type = entry.compress_type if entry.compress_type is not None else compression_for(entry.name)
+            # Platform-independent attributes (rw-r--r--, "Unix" creator)
+            info.create_system = 3
+            info.external_attr = 0o644 << 16
+            if info.compress_type == zipfile.ZIP_DEFLATED:
+                _set_compresslevel(info, entry.compresslevel if entry.compresslevel is not None else compresslevel)
+            started = time.perf_counter()
+            with zf.open(info, "w") as dest:
+                buf = []
+                size = 0
+                for chunk in iter_chunks(entry.data):
+                    buf.append(chunk)
+                    size += len(chunk)
+                    if size >= CHUNK_SIZE:
+                        dest.write(b"".join(buf))
+                        buf, size = [], 0
+                if buf:
+                    dest.write(b"".join(buf))
+            if on_entry is not None:
+                on_entry(entry.name, time.perf_counter() - started, info.file_size, info.compress_size)
+            count += 1
+    return count
@@ -0,0 +1,309 @@
+import re
+import csv
+import codecs
+import itertools
+
+# Streaming product-feed reader.
+# The CSV body is consumed incrementally (from an HTTP response or any text source),
+# the delimiter is sniffed from a bounded prefix, and rows become compact Product
+# records. Row and byte budgets stop oversized feeds early; malformed rows are
+# collected as RowError entries instead of being silently dropped.
+#
+# Accepted columns: Name | Price | Description | Img1 | Img2 | Img3
+# A header row is optional; when present, columns are matched by name.
+
+DEFAULT_MAX_ROWS = 20000
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+SNIFF_BYTES = 8192
+CHUNK_SIZE = 64 * 1024
+MAX_IMAGES = 3
+# Cap on collected errors so a completely broken feed doesn't grow without bound
+MAX_ERRORS = 200
+
+DELIMITERS = ",|;\t"
+HEADER_ALIASES = {
+    "name": ("name", "service_name", "product", "title"),
+    "price": ("price", "cost", "amount"),
+    "desc": ("description", "desc", "details"),
+}
+
+
+class Product:
+    """One catalog entry. images holds every image URL; img is the first one."""
+
+    __slots__ = ("name", "price", "desc", "images", "img", "img_srcset")
+
+    def __init__(self, name: str, price: str = "", desc: str = "", images=(), img: str = None, img_srcset: str = ""):
+        self.name = name
+        self.price = price
+        self.desc = desc
+        self.images = tuple(images)
+        self.img = img if img is not None else (self.images[0] if self.images else "")
+        self.img_srcset = img_srcset
+
+    def get(self, key: str, default=None):
+        # dict-style access for code written against the old product dicts
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def replace(self, **changes) -> "Product":
+        values = self.to_dict()
+        values.update(changes)
+        return Product(**values)
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Product":
+        return cls(
+            data.get("name", ""),
+            data.get("price", ""),
+            data.get("desc", ""),
+            data.get("images") or ([data["img"]] if data.get("img") else ()),
+            img=data.get("img"),
+            img_srcset=data.get("img_srcset", ""),
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, Product):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, k) for k in self.__slots__))
+
+    def __repr__(self):
+        return f"Product(name={self.name!r}, price={self.price!r})"
+
+
+class RowError:
+    __slots__ = ("line", "message")
+
+    def __init__(self, line: int, message: str):
+        self.line = line
+        self.message = message
+
+    def __str__(self):
+        return f"line {self.line}: {self.message}" if self.line else self.message
+
+    def __repr__(self):
+        return f"RowError({self.line!r}, {self.message!r})"
+
+
+class ProductFeed:
+    """Parsed feed: products plus the problems found while reading it."""
+
+    __slots__ = ("products", "errors", "truncated")
+
+    def __init__(self, products=(), errors=(), truncated: bool = False):
+        self.products = tuple(products)
+        self.errors = tuple(errors)
+        self.truncated = truncated
+
+    def to_dict(self) -> dict:
+        return {
+            "products": [p.to_dict() for p in self.products],
+            "errors": [[e.line, e.message] for e in self.errors],
+            "truncated": self.truncated,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ProductFeed":
+        return cls(
+            [Product.from_dict(p) for p in data.get("products") or []],
+            [RowError(line, message) for line, message in data.get("errors") or []],
+            bool(data.get("truncated")),
+        )
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class FeedReader:
+    """
+    Turns a CSV text stream into a ProductFeed.
+    max_rows: data rows kept at most (further rows mark the feed truncated).
+    max_bytes: body bytes read at most; the rest of the download is abandoned.
+    """
+
+    def __init__(self, max_rows: int = DEFAULT_MAX_ROWS, max_bytes: int = DEFAULT_MAX_BYTES, sniff_bytes: int = SNIFF_BYTES):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.sniff_bytes = sniff_bytes
+
+    def read_response(self, resp) -> ProductFeed:
+        """Parse a streamed requests response (requests.get(..., stream=True))."""
+        # requests assumes ISO-8859-1 for text/* without a charset; sheets are UTF-8
+        content_type = (resp.headers.get("Content-Type") or "").lower()
+        encoding = resp.encoding if "charset" in content_type and resp.encoding else "utf-8"
+        try:
+            return self.read_chunks(resp.iter_content(chunk_size=CHUNK_SIZE), encoding=encoding)
+        finally:
+            close = getattr(resp, "close", None)
+            if close is not None:
+                close()
+
+    def read_chunks(self, chunks, encoding: str = "utf-8") -> ProductFeed:
+        """Parse an iterable of bytes (or str) chunks."""
+        return self._read(_iter_lines(self._decode(chunks, encoding)))
+
+    def read_text(self, text: str) -> ProductFeed:
+        return self.read_chunks([text or ""])
+
+    def _decode(self, chunks, encoding: str):
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        consumed = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            consumed += len(chunk)
+            if self.max_bytes and consumed > self.max_bytes:
+                # Keep what fits; the partial last line is dropped by the caller
+                keep = len(chunk) - (consumed - self.max_bytes)
+                text = decoder.decode(chunk[:keep])
+                if text:
+                    yield text
+                raise BudgetExceeded()
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def _read(self, lines) -> ProductFeed:
+        products = []
+        errors = []
+        truncated = False
+
+        def error(line_no, message):
+            if len(errors) < MAX_ERRORS:
+                errors.append(RowError(line_no, message))
+
+        try:
+            prefix, lines = self._take_prefix(lines)
+            reader = csv.reader(itertools.chain(prefix, lines), delimiter=self._sniff("".join(prefix)))
+            columns = None
+            for row in reader:
+                if not any(cell.strip() for cell in row):
+                    continue
+                if columns is None:
+                    columns = _header_columns(row, reader.line_num, error)
+                    if columns is not None:
+                        continue
+                    columns = _POSITIONAL
+                if len(products) >= self.max_rows:
+                    truncated = True
+                    break
+                products.append(_row_to_product(row, columns, reader.line_num, error))
+        except BudgetExceeded:
+            # Only complete lines were parsed; the cut-off tail is discarded
+            truncated = True
+        except csv.Error as exc:
+            error(0, f"unreadable CSV: {exc}")
+
+        if truncated:
+            error(0, f"feed truncated after {len(products)} products (limits: {self.max_rows} rows, {self.max_bytes} bytes)")
+        return ProductFeed(products, errors, truncated)
+
+    def _take_prefix(self, lines):
+        prefix = []
+        size = 0
+        try:
+            for line in lines:
+                prefix.append(line)
+                size += len(line)
+                if size >= self.sniff_bytes:
+                    break
+        except BudgetExceeded:
+            # Parse what fits in the budget, then report truncation
+            return prefix, _budget_exceeded()
+        return prefix, lines
+
+    def _sniff(self, sample: str) -> str:
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+        except csv.Error:
+            # Heuristic: if pipe found in first few lines use pipe else comma
+            first_chunk = "\n".join(sample.splitlines()[:5])
+            return "|" if "|" in first_chunk else ","
+
+
+# javascript:/vbscript: (any case, leading whitespace/control characters ignored)
+_SCRIPT_URL = re.compile(r"[\x00-\x20]*(?:java|vb)script:", re.IGNORECASE)
+# column name -> index; images is a list of indexes
+_POSITIONAL = {"name": 0, "price": 1, "desc": 2, "images": list(range(3, 3 + MAX_IMAGES))}
+
+
+def _header_columns(row, line_no, error):
+    header = [c.strip().lower() for c in row]
+    if not any(h in HEADER_ALIASES["name"] for h in header):
+        return None
+    columns = {"images": []}
+    for idx, h in enumerate(header):
+        for key, aliases in HEADER_ALIASES.items():
+            if h in aliases and key not in columns:
+                columns[key] = idx
+        if h.startswith(("img", "image", "photo")) and len(columns["images"]) < MAX_IMAGES:
+            columns["images"].append(idx)
+    # Fields without a recognised header are read by position, like a headerless feed
+    # ("Name,MRP,About,Picture"), as long as that column isn't claimed by another field
+    claimed = {idx for key, idx in columns.items() if key != "images"} | set(columns["images"])
+    for key in ("price", "desc"):
+        idx = _POSITIONAL[key]
+        if key not in columns and idx < len(header) and idx not in claimed:
+            columns[key] = idx
+            claimed.add(idx)
+            error(line_no, f"column {row[idx].strip()!r} read as {key} by position")
+    # Only the first image column: later unnamed columns are more likely notes than photos
+    idx = _POSITIONAL["images"][0]
+    if not columns["images"] and idx < len(header) and idx not in claimed:
+        columns["images"].append(idx)
+        claimed.add(idx)
+        error(line_no, f"column {row[idx].strip()!r} read as an image by position")
+    for idx in range(len(header)):
+        if idx not in claimed and header[idx]:
+            error(line_no, f"ignored column {row[idx].strip()!r}")
+    return columns
+
+
+def _row_to_product(row, columns, line_no, error):
+    def cell(key):
+        idx = columns.get(key)
+        return row[idx].strip() if idx is not None and idx < len(row) else ""
+
+    # Like the original reader: rows without a name and relative/other image paths are
+    # kept as they are; only script URLs are refused
+    images = []
+    for idx in columns["images"]:
+        url = row[idx].strip() if idx < len(row) else ""
+        if not url:
+            continue
+        if _SCRIPT_URL.match(url):
+            error(line_no, f"ignored script URL in an image column: {url[:80]}")
+        else:
+            images.append(url)
+    return Product(cell("name"), cell("price"), cell("desc"), images)
+
+
+def _budget_exceeded():
+    raise BudgetExceeded()
+    yield
+
+
+def _iter_lines(texts):
+    """Re-split decoded text chunks into lines (keeping line endings for csv)."""
+    pending = ""
+    for text in texts:
+        pending += text
+        start = 0
+        while True:
+            idx = pending.find("\n", start)
+            if idx < 0:
+                break
+            yield pending[start : idx + 1]
+            start = idx + 1
+        pending = pending[start:]
+    if pending:
+        yield pending
@@ -0,0 +1,234 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from .feed import ProductFeed, RowError
+from .fetch import get_default_client
+
+# Cache for parsed product feeds (Google Sheets / CSV links).
+# Streamlit reruns app.py on every widget change, so the sheet would otherwise be
+# downloaded on every keystroke. Entries are kept in memory (already parsed) and can
+# optionally be persisted to a directory so other processes can reuse them.
+
+DEFAULT_TTL = 60
+# Parsed feeds kept in memory (each can hold up to FeedReader.max_rows products)
+DEFAULT_MAX_ENTRIES = 32
+
+
+def normalize_sheet_url(sheet_url: str) -> str:
+    """
+    Normalize a sheet link into the URL that is actually fetched.
+    Common Google Sheets /edit links are converted to the CSV export endpoint.
+    """
+    url = (sheet_url or "").strip()
+    if "docs.google.com/spreadsheets" in url:
+        # If it's the /edit or /edit#gid=... form, convert
+        url = re.sub(r"/edit.*$", "/export?format=csv", url)
+    return url
+
+
+class FeedEntry:
+    __slots__ = ("url", "feed", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, url, feed, etag=None, last_modified=None, fetched_at=0.0):
+        self.url = url
+        self.feed = feed
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "feed": self.feed.to_dict(),
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeedEntry":
+        return cls(
+            data["url"],
+            ProductFeed.from_dict(data.get("feed") or {}),
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+            fetched_at=float(data.get("fetched_at") or 0.0),
+        )
+
+
+def _stale(entry: FeedEntry, reason: str) -> ProductFeed:
+    feed = entry.feed
+    error = RowError(0, f"could not refresh product sheet ({reason}); showing the copy from {time.ctime(entry.fetched_at)}")
+    return ProductFeed(feed.products, feed.errors + (error,), truncated=feed.truncated)
+
+
+class ProductFeedCache:
+    """
+    Product feed cache keyed by the normalized sheet URL.
+
+    - Entries younger than `ttl` seconds are served without any network access.
+    - Stale entries are revalidated with If-None-Match / If-Modified-Since; a 304
+      keeps the already-parsed ProductFeed.
+    - If revalidation fails (network error or 5xx), the stale feed is served with the
+      failure appended to its errors; the next call tries again.
+    - At most `max_entries` feeds stay in memory, least recently used first out.
+    - If `cache_dir` is given, entries are also persisted there as JSON.
+    - Requests go through `client` (default: the shared generator.fetch client).
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        cache_dir: str = None,
+        timeout: float = 8,
+        client=None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.client = client
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, sheet_url: str, parse) -> ProductFeed:
+        """
+        Return the ProductFeed for sheet_url, fetching it only when needed.
+        `parse` turns the streamed response into a ProductFeed (see FeedReader.read_response).
+        """
+        url = normalize_sheet_url(sheet_url)
+        with self._lock_for(url):
+            entry = self._lookup(url)
+            now = time.time()
+            if entry is not None and now - entry.fetched_at < self.ttl:
+                return entry.feed
+
+            headers = {}
+            if entry is not None:
+                if entry.etag:
+                    headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    headers["If-Modified-Since"] = entry.last_modified
+
+            client = self.client or get_default_client()
+            try:
+                resp = client.get(url, headers=headers, timeout=self.timeout, stream=True)
+            except OSError as exc:  # requests.RequestException is an OSError
+                if entry is None:
+                    raise
+                return _stale(entry, f"{type(exc).__name__}: {exc}")
+            if resp.status_code >= 500 and entry is not None:
+                resp.close()
+                return _stale(entry, f"HTTP {resp.status_code}")
+            if resp.status_code == 304 and entry is not None:
+                resp.close()
+                entry.fetched_at = now
+                self._store(entry)
+                return entry.feed
+
+            try:
+                resp.raise_for_status()
+            except Exception:
+                resp.close()
+                raise
+            entry = FeedEntry(
+                url,
+                parse(resp),
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+                fetched_at=now,
+            )
+            self._store(entry)
+            return entry.feed
+
+    def invalidate(self, sheet_url: str = None):
+        """Drop one entry (or everything if sheet_url is None), including persisted copies."""
+        with self._lock:
+            if sheet_url is None:
+                urls = list(self._entries)
+                self._entries.clear()
+            else:
+                urls = [normalize_sheet_url(sheet_url)]
+                self._entries.pop(urls[0], None)
+        if self.cache_dir:
+            if sheet_url is None:
+                paths = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if f.endswith(".json")]
+            else:
+                paths = [self._path(u) for u in urls]
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _lock_for(self, url: str) -> threading.Lock:
+        # One lock per URL so concurrent reruns don't download the same sheet twice
+        with self._lock:
+            lock = self._url_locks.get(url)
+            if lock is None:
+                lock = self._url_locks[url] = threading.Lock()
+            return lock
+
+    def _lookup(self, url: str):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+        if entry is not None or not self.cache_dir:
+            return entry
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as fh:
+                entry = FeedEntry.from_dict(json.load(fh))
+        except (OSError, ValueError, KeyError):
+            return None
+        if entry.url != url:
+            return None
+        self._remember(entry)
+        return entry
+
+    def _remember(self, entry: FeedEntry):
+        with self._lock:
+            self._entries[entry.url] = entry
+            self._entries.move_to_end(entry.url)
+            while len(self._entries) > self.max_entries:
+                old_url, _ = self._entries.popitem(last=False)
+                lock = self._url_locks.get(old_url)
+                # A held lock belongs to a get() in progress; it is dropped on a later eviction
+                if lock is not None and not lock.locked():
+                    del self._url_locks[old_url]
+            # Locks of URLs that were fetched unsuccessfully, or evicted while in use
+            if len(self._url_locks) > 2 * self.max_entries:
+                for url in [u for u, lock in self._url_locks.items() if u not in self._entries and not lock.locked()]:
+                    del self._url_locks[url]
+
+    def _store(self, entry: FeedEntry):
+        self._remember(entry)
+        if not self.cache_dir:
+            return
+        path = self._path(entry.url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(entry.to_dict(), fh)
+            os.replace(tmp, path)
+        except OSError:
+            # Persistence is best-effort; the in-memory entry is still valid
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+
+# Shared by all SiteBuilder instances unless one is injected
+default_feed_cache = ProductFeedCache()
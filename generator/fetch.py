@@ -0,0 +1,154 @@
+import os
+import asyncio
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared outbound HTTP layer for the generator package (product sheets, images).
+#
+# HttpClient keeps one pooled requests.Session (keep-alive per host), retries
+# transient failures with exponential backoff and bounds the number of requests in
+# flight. AsyncHttpClient wraps it for asyncio code that fetches many sheets/images
+# at once. The default client can be replaced (set_default_client) or a client can
+# be passed to ProductFeedCache / AssetBundler, e.g. to target a local stub server.
+
+DEFAULT_TIMEOUT = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_CONCURRENCY = 16
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Longest Retry-After we honour before a retry; a sheet host answering
+# "Retry-After: 3600" must not block a Streamlit rerun or a batch worker for an hour
+DEFAULT_MAX_RETRY_AFTER = 10
+USER_AGENT = "KaydiemTitan/25.0 (+https://www.kaydiemscriptlab.com/)"
+
+
+class CappedRetry(Retry):
+    """urllib3 Retry whose Retry-After sleeps are capped at max_retry_after seconds."""
+
+    def __init__(self, *args, max_retry_after: float = DEFAULT_MAX_RETRY_AFTER, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kwargs):
+        # urllib3 builds a fresh Retry after every attempt; keep the cap
+        retry = super().new(**kwargs)
+        retry.max_retry_after = self.max_retry_after
+        return retry
+
+    def get_retry_after(self, response):
+        seconds = super().get_retry_after(response)
+        return None if seconds is None else min(seconds, self.max_retry_after)
+
+
+class HttpClient:
+    """
+    Pooled, retrying HTTP client.
+    max_concurrency bounds requests being sent at the same time; with stream=True the
+    body is read after the slot is released.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        pool_connections: int = 10,
+        pool_maxsize: int = DEFAULT_MAX_CONCURRENCY,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        user_agent: str = USER_AGENT,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+    ):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        retry = CappedRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            # Hand the last response back so callers see the real status via raise_for_status
+            raise_on_status=False,
+            respect_retry_after_header=True,
+            max_retry_after=max_retry_after,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+    def get(self, url: str, headers: dict = None, timeout: float = None, stream: bool = False) -> requests.Response:
+        with self._slots:
+            return self.session.get(url, headers=headers, timeout=timeout or self.timeout, stream=stream)
+
+    def get_bytes(self, url: str, timeout: float = None) -> bytes:
+        resp = self.get(url, timeout=timeout)
+        resp.raise_for_status()
+        return resp.content
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncHttpClient:
+    """asyncio front-end: requests run in worker threads, bounded by an asyncio semaphore."""
+
+    def __init__(self, client: HttpClient = None, max_concurrency: int = None):
+        self.client = client or get_default_client()
+        self.max_concurrency = max_concurrency or self.client.max_concurrency
+        self._slots = None
+
+    async def get(self, url: str, headers: dict = None, timeout: float = None) -> requests.Response:
+        if self._slots is None:
+            # Created lazily so it binds to the running event loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        async with self._slots:
+            return await asyncio.to_thread(self.client.get, url, headers, timeout)
+
+    async def get_bytes(self, url: str, timeout: float = None) -> bytes:
+        resp = await self.get(url, timeout=timeout)
+        resp.raise_for_status()
+        return resp.content
+
+    async def fetch_all(self, urls, timeout: float = None) -> dict:
+        """
+        Fetch many URLs concurrently. Returns {url: bytes or Exception}; one failure
+        doesn't cancel the others.
+        """
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.get_bytes(u, timeout) for u in unique), return_exceptions=True)
+        return dict(zip(unique, results))
+
+
+_default_client = None
+_default_pid = None
+_default_lock = threading.Lock()
+
+
+def get_default_client() -> HttpClient:
+    """Process-wide client; recreated after fork so workers don't share sockets."""
+    global _default_client, _default_pid
+    with _default_lock:
+        if _default_client is None or _default_pid != os.getpid():
+            _default_client = HttpClient()
+            _default_pid = os.getpid()
+        return _default_client
+
+
+def set_default_client(client: HttpClient):
+    """Replace the process-wide client (None restores a fresh default on next use)."""
+    global _default_client, _default_pid
+    with _default_lock:
+        _default_client = client
+        _default_pid = os.getpid() if client is not None else None
@@ -0,0 +1,171 @@
+import os
+import json
+import hashlib
+import tempfile
+
+from .export import iter_chunks
+from .instrumentation import NULL_COLLECTOR
+from .optimize import PRECOMPRESS_FORMATS, optimize_entries
+
+# Incremental export into a directory (e.g. a GitHub Pages checkout).
+#
+# Every ArchiveEntry from SiteBuilder.iter_site_entries carries a fingerprint of its
+# inputs (template sources, prepared context digest, prod_url, ...). A manifest in
+# the output directory remembers, per file, the input fingerprint and the sha256 of
+# what was written:
+#   - same input fingerprint and the file is still there -> not rendered at all
+#   - rendered but byte-identical to the manifest hash    -> not rewritten
+#   - files from the previous build that are gone          -> removed (prune=True)
+# Unchanged files keep their mtime, so rsync/git/CDN uploads only see real changes.
+
+MANIFEST_NAME = ".titan-manifest.json"
+# Bump when the output of unchanged inputs changes (e.g. new page wrappers)
+OUTPUT_VERSION = "1"
+
+
+def fingerprint(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class BuildReport:
+    """Outcome of one incremental build: file names written, left unchanged and removed."""
+
+    __slots__ = ("written", "unchanged", "removed")
+
+    def __init__(self):
+        self.written = []
+        self.unchanged = []
+        self.removed = []
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.written or self.removed)
+
+    def to_dict(self) -> dict:
+        return {"written": list(self.written), "unchanged": list(self.unchanged), "removed": list(self.removed)}
+
+
+def load_manifest(out_dir: str) -> dict:
+    """{"options": ..., "files": {name: {"input": fp, "sha256": hex, "group": name}}}, empty if missing/corrupt."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {"files": {}}
+    if not isinstance(data, dict) or not isinstance(data.get("files"), dict):
+        return {"files": {}}
+    return data
+
+
+def _file_mode() -> int:
+    """0o666 minus the process umask: what open() would give a new file."""
+    if not _FILE_MODE:
+        # umask can only be read by setting it; done once
+        umask = os.umask(0o022)
+        os.umask(umask)
+        _FILE_MODE.append(0o666 & ~umask)
+    return _FILE_MODE[0]
+
+
+_FILE_MODE = []
+
+
+def _write_atomic(path: str, chunks):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        # mkstemp creates 0600 files; published sites must be readable by the web server
+        os.chmod(tmp, _file_mode())
+        with os.fdopen(fd, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _target(out_dir: str, name: str) -> str:
+    path = os.path.normpath(os.path.join(out_dir, name))
+    if os.path.commonpath([os.path.abspath(out_dir), os.path.abspath(path)]) != os.path.abspath(out_dir):
+        raise ValueError(f"entry escapes output directory: {name}")
+    return path
+
+
+def build_to_directory(
+    entries,
+    out_dir: str,
+    minify: bool = False,
+    precompress: bool = False,
+    prune: bool = True,
+    collector=NULL_COLLECTOR,
+) -> BuildReport:
+    """
+    Write ArchiveEntry objects into out_dir, skipping unchanged work (see module comment).
+    minify/precompress are applied per entry, like SiteBuilder.export does.
+    Entries without a fingerprint are always rendered (but still only rewritten if changed).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    options = {"minify": bool(minify), "precompress": list(PRECOMPRESS_FORMATS) if precompress else []}
+    previous = load_manifest(out_dir)
+    old_files = previous["files"] if previous.get("options") == options else {}
+    # Any previous record still counts for "is the content identical?" checks
+    old_hashes = {name: rec.get("sha256") for name, rec in previous["files"].items()}
+
+    # Outputs grouped by the entry that produced them (index.html -> index.html.gz, ...)
+    groups = {}
+    for name, rec in old_files.items():
+        groups.setdefault(rec.get("group", name), []).append(name)
+
+    report = BuildReport()
+    files = {}
+    for entry in entries:
+        fp = entry.fingerprint
+        outputs = groups.get(entry.name, [])
+        if (
+            fp is not None
+            and outputs
+            and all(old_files[n].get("input") == fp and os.path.isfile(_target(out_dir, n)) for n in outputs)
+        ):
+            for n in outputs:
+                files[n] = old_files[n]
+                report.unchanged.append(n)
+            continue
+
+        produced = [entry]
+        if minify or precompress:
+            produced = optimize_entries(
+                produced,
+                minify_text=minify,
+                precompress_formats=PRECOMPRESS_FORMATS if precompress else (),
+                collector=collector,
+            )
+        for item in produced:
+            data = b"".join(iter_chunks(item.data))
+            digest = hashlib.sha256(data).hexdigest()
+            path = _target(out_dir, item.name)
+            if old_hashes.get(item.name) == digest and os.path.isfile(path):
+                report.unchanged.append(item.name)
+            else:
+                _write_atomic(path, (data,))
+                report.written.append(item.name)
+            files[item.name] = {"input": fp, "sha256": digest, "group": entry.name}
+
+    if prune:
+        for name in previous["files"]:
+            if name in files:
+                continue
+            try:
+                os.unlink(_target(out_dir, name))
+            except (OSError, ValueError):
+                continue
+            report.removed.append(name)
+
+    manifest = {"version": OUTPUT_VERSION, "options": options, "files": files}
+    _write_atomic(os.path.join(out_dir, MANIFEST_NAME), (json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"),))
+    return report
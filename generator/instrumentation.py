@@ -0,0 +1,113 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Per-stage timings and counters for SiteBuilder.
+#
+# A collector is any object with record(stage, seconds, **counters). SiteBuilder
+# reports stages such as:
+#   sanitize, feed.fetch, render:<template>, archive:<entry>, assets.bundle, export
+# with counters like bytes_in / bytes_out (UTF-8 encoded sizes) / products.
+# NullCollector (the default) discards everything; MemoryCollector aggregates in
+# memory for display or reports.
+#
+# Stage times are inclusive, not exclusive: entry bodies are rendered lazily while the
+# archive is written, so "export" (and each archive:<entry>) also contains the
+# render:* and optimize time spent producing them. Don't add stages up.
+
+
+class NullCollector:
+    def record(self, stage: str, seconds: float, **counters):
+        pass
+
+
+NULL_COLLECTOR = NullCollector()
+
+
+class MemoryCollector:
+    """Thread-safe in-memory aggregate: per stage call count, total seconds and summed counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage: str, seconds: float, **counters):
+        with self._lock:
+            agg = self._stages.get(stage)
+            if agg is None:
+                agg = self._stages[stage] = {"count": 0, "seconds": 0.0}
+            agg["count"] += 1
+            agg["seconds"] += seconds
+            for key, value in counters.items():
+                if isinstance(value, (int, float)):
+                    agg[key] = agg.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+    def summary(self) -> list:
+        """Stages in first-seen order as dicts (stage, count, seconds, counters...)."""
+        with self._lock:
+            return [dict(agg, stage=stage, seconds=round(agg["seconds"], 6)) for stage, agg in self._stages.items()]
+
+    def totals(self, prefix: str = "") -> dict:
+        """{stage: seconds} for stages starting with prefix."""
+        with self._lock:
+            return {stage: round(agg["seconds"], 6) for stage, agg in self._stages.items() if stage.startswith(prefix)}
+
+
+class RecordingCollector:
+    """Keeps raw records so another process can replay them (e.g. into a MemoryCollector)."""
+
+    def __init__(self):
+        self.records = []
+
+    def record(self, stage: str, seconds: float, **counters):
+        self.records.append((stage, seconds, counters))
+
+    def drain(self) -> list:
+        records, self.records = self.records, []
+        return records
+
+
+def replay(records, collector):
+    for stage, seconds, counters in records:
+        collector.record(stage, seconds, **counters)
+
+
+@contextmanager
+def timed(collector, stage: str, **counters):
+    """Time a block; the yielded dict can be updated with counters before it ends."""
+    started = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        collector.record(stage, time.perf_counter() - started, **counters)
+
+
+def timed_chunks(collector, stage: str, chunks):
+    """Wrap a chunk iterator, recording time spent producing chunks and bytes_out."""
+    if isinstance(collector, NullCollector):
+        # Nothing is recorded, so skip the per-chunk timing and encoding
+        return chunks
+    return _timed_chunks(collector, stage, chunks)
+
+
+def _timed_chunks(collector, stage: str, chunks):
+    elapsed = 0.0
+    size = 0
+    iterator = iter(chunks)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                elapsed += time.perf_counter() - started
+                break
+            elapsed += time.perf_counter() - started
+            size += len(chunk.encode("utf-8")) if isinstance(chunk, str) else len(chunk)
+            yield chunk
+    finally:
+        collector.record(stage, elapsed, bytes_out=size)
@@ -0,0 +1,244 @@
+import re
+import gzip
+import time
+
+from .export import ArchiveEntry, iter_chunks
+from .instrumentation import NULL_COLLECTOR
+
+# Optional post-render optimization for exports:
+#   - minify HTML plus inline <style>/<script> (conservatively: JS keeps its line
+#     structure and string/template literals are never touched, so the
+#     privacy_html/terms_html literals in base.html.j2 survive byte for byte)
+#   - precompressed .gz/.br siblings for text assets, for static hosts that serve them
+
+TEXT_SUFFIXES = (".html", ".css", ".js", ".xml", ".txt", ".json", ".svg")
+PRECOMPRESS_FORMATS = ("gz", "br")
+# Below this, compressed siblings aren't worth the extra files
+PRECOMPRESS_MIN_BYTES = 256
+
+BLOCK_TAGS = (
+    "html|head|body|meta|link|title|style|script|main|section|nav|footer|header|article|aside"
+    "|div|p|h[1-6]|ul|ol|li|table|thead|tbody|tr|td|th|form|iframe|br|hr|!doctype"
+)
+_RAW_BLOCK = re.compile(r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)", re.IGNORECASE | re.DOTALL)
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_SPACE = re.compile(r"\s+")
+# A whitespace run with a line break stays one line break (white-space:pre-line text)
+_NEWLINE_RUN = re.compile(r"\s*\n\s*")
+_BLANK_RUN = re.compile(r"[^\S\n]+")
+_AROUND_BLOCK = re.compile(r"\s*(</?(?:%s)\b[^>]*>)\s*" % BLOCK_TAGS, re.IGNORECASE)
+
+
+def minify_html(html: str) -> str:
+    """
+    Collapse whitespace runs (to one newline if they contain one, else one space) and
+    drop comments; script/style are minified, pre/textarea kept.
+    """
+    out = []
+    pos = 0
+    for m in _RAW_BLOCK.finditer(html):
+        out.append(_minify_markup(html[pos : m.start()]))
+        open_tag, tag, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if tag == "style":
+            body = minify_css(body)
+        elif tag == "script":
+            body = minify_js(body)
+        out.append(_SPACE.sub(" ", open_tag) + body + close_tag)
+        pos = m.end()
+    out.append(_minify_markup(html[pos:]))
+    return "".join(out).strip()
+
+
+def _minify_markup(text: str) -> str:
+    text = _COMMENT.sub("", text)
+    text = _BLANK_RUN.sub(" ", _NEWLINE_RUN.sub("\n", text))
+    return _AROUND_BLOCK.sub(r"\1", text)
+
+
+_CSS_STRING = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON = re.compile(r":\s+")
+
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT.sub("", css)
+    parts = _CSS_STRING.split(css)
+    for i in range(0, len(parts), 2):
+        # Even indexes are outside string literals
+        part = _SPACE.sub(" ", parts[i])
+        part = _CSS_PUNCT.sub(r"\1", part)
+        parts[i] = _CSS_COLON.sub(":", part)
+    return "".join(parts).replace(";}", "}").strip()
+
+
+# Characters after which a "/" starts a regex literal rather than a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^\n")
+
+
+def minify_js(js: str) -> str:
+    """
+    Strip comments, indentation and blank lines outside string, template and regex
+    literals. Lines are never joined, so automatic semicolon insertion is unaffected.
+    """
+    out = []
+    line = []
+    i = 0
+    n = len(js)
+    prev = "\n"  # last significant character outside literals
+
+    def end_line():
+        text = "".join(line).strip()
+        if text:
+            out.append(text)
+        line.clear()
+
+    while i < n:
+        c = js[i]
+        if c in "\"'`":
+            j = _skip_literal(js, i, c)
+            line.append(js[i:j])
+            prev = c
+            i = j
+        elif c == "/" and js.startswith("//", i):
+            while i < n and js[i] != "\n":
+                i += 1
+        elif c == "/" and js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            line.append(" ")
+        elif c == "/" and prev in _REGEX_PRECEDERS:
+            j = _skip_regex(js, i)
+            line.append(js[i:j])
+            prev = "/"
+            i = j
+        elif c == "\n":
+            end_line()
+            prev = "\n"
+            i += 1
+        else:
+            line.append(c)
+            if not c.isspace():
+                prev = c
+            i += 1
+    end_line()
+    return "\n".join(out)
+
+
+def _skip_literal(js: str, i: int, quote: str) -> int:
+    """Index just past the string/template literal starting at i."""
+    n = len(js)
+    j = i + 1
+    depth = 0  # ${ ... } nesting inside template literals
+    while j < n:
+        c = js[j]
+        if c == "\\":
+            j += 2
+            continue
+        if quote == "`":
+            if depth == 0 and js.startswith("${", j):
+                depth = 1
+                j += 2
+                continue
+            if depth:
+                if c == "{":
+                    depth += 1
+                elif c == "}":
+                    depth -= 1
+                j += 1
+                continue
+        if c == quote:
+            return j + 1
+        if c == "\n" and quote != "`":
+            return j
+        j += 1
+    return n
+
+
+def _skip_regex(js: str, i: int) -> int:
+    n = len(js)
+    j = i + 1
+    in_class = False
+    while j < n:
+        c = js[j]
+        if c == "\\":
+            j += 2
+            continue
+        if c == "\n":
+            return j
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            j += 1
+            while j < n and js[j].isalpha():
+                j += 1
+            return j
+        j += 1
+    return n
+
+
+def minify(name: str, text: str) -> str:
+    lower = name.lower()
+    if lower.endswith(".html"):
+        return minify_html(text)
+    if lower.endswith(".css"):
+        return minify_css(text)
+    if lower.endswith(".js"):
+        return minify_js(text)
+    return text
+
+
+def precompress(data: bytes, formats=PRECOMPRESS_FORMATS) -> dict:
+    """Return {"gz": bytes, "br": bytes} (br only if the brotli module is installed)."""
+    out = {}
+    if "gz" in formats:
+        # mtime=0 keeps the output deterministic
+        out["gz"] = gzip.compress(data, compresslevel=9, mtime=0)
+    if "br" in formats:
+        brotli = _brotli()
+        if brotli is not None:
+            out["br"] = brotli.compress(data, quality=11)
+    return out
+
+
+_BROTLI = []
+
+
+def _brotli():
+    """The optional brotli module, imported on first use (None when not installed)."""
+    if not _BROTLI:
+        try:
+            import brotli
+        except ImportError:  # optional: .br siblings are skipped without it
+            brotli = None
+        _BROTLI.append(brotli)
+    return _BROTLI[0]
+
+
+def optimize_entries(entries, minify_text: bool = True, precompress_formats=PRECOMPRESS_FORMATS, collector=NULL_COLLECTOR):
+    """
+    Transform an ArchiveEntry stream: minify text entries and add precompressed
+    siblings (index.html -> index.html.gz, index.html.br). Other entries pass through.
+    """
+    for entry in entries:
+        if not entry.name.lower().endswith(TEXT_SUFFIXES):
+            yield entry
+            continue
+        started = time.perf_counter()
+        data = b"".join(iter_chunks(entry.data))
+        size_in = len(data)
+        if minify_text:
+            data = minify(entry.name, data.decode("utf-8")).encode("utf-8")
+        siblings = precompress(data, precompress_formats) if precompress_formats and len(data) >= PRECOMPRESS_MIN_BYTES else {}
+        collector.record(
+            "optimize",
+            time.perf_counter() - started,
+            bytes_in=size_in,
+            bytes_out=len(data),
+            precompressed=sum(len(v) for v in siblings.values()),
+        )
+        yield ArchiveEntry(entry.name, data, entry.compress_type, entry.compresslevel, entry.fingerprint)
+        for fmt, body in siblings.items():
+            yield ArchiveEntry(f"{entry.name}.{fmt}", body, fingerprint=entry.fingerprint)
@@ -1,17 +1,105 @@
 import re
-import bleach
+import hashlib
+import threading
+from collections import OrderedDict
 from urllib.parse import urlparse
 
 # Allowed tags and attributes for content fields
 ALLOWED_TAGS = ["a", "b", "i", "u", "em", "strong", "p", "br", "ul", "ol", "li", "h2", "h3", "img"]
 ALLOWED_ATTRS = {"a": ["href", "title", "rel", "target"], "img": ["src", "alt", "width", "height"]}
 
+DEFAULT_CACHE_SIZE = 2048
+# Larger values are cleaned every time rather than pinned in the cache
+MAX_CACHED_CHARS = 1 << 20
+
+# Anything bleach could change: markup/entities, CR (normalized to LF) and control
+# characters (dropped or replaced). Text without these comes back from bleach as is.
+_NEEDS_CLEANING = re.compile(r"[<>&\r\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff]")
+
+
+class Sanitizer:
+    """
+    bleach cleaning for one policy (tags/attributes/strip), built for repeated use:
+      - bleach.Cleaner objects are built once per thread (they are not thread-safe)
+      - markup-free text skips the html5lib parse entirely (bleach itself is only
+        imported once some value actually needs cleaning)
+      - results are kept in a bounded LRU keyed by a hash of the input
+    """
+
+    def __init__(self, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS, strip: bool = True, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.tags = frozenset(tags)
+        self.attributes = attributes
+        self.strip = strip
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _cleaner(self):
+        cleaner = getattr(self._local, "cleaner", None)
+        if cleaner is None:
+            import bleach
+
+            cleaner = self._local.cleaner = bleach.Cleaner(tags=self.tags, attributes=self.attributes, strip=self.strip)
+        return cleaner
+
+    def clean(self, value: str) -> str:
+        if not value:
+            return ""
+        if not _NEEDS_CLEANING.search(value):
+            return value
+        if len(value) > MAX_CACHED_CHARS or not self.cache_size:
+            return self._cleaner().clean(value)
+        key = hashlib.blake2b(value.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        result = self._cleaner().clean(value)
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def clean_many(self, values) -> list:
+        """Clean a list of values (e.g. service entries); repeated values are cleaned once."""
+        done = {}
+        out = []
+        for value in values:
+            result = done.get(value)
+            if result is None:
+                result = done[value] = self.clean(value)
+            out.append(result)
+        return out
+
+    def cache_info(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "max_size": self.cache_size}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+default_sanitizer = Sanitizer()
+
 
 def clean_html(value: str) -> str:
     if not value:
         return ""
     # Trim and clean
-    return bleach.clean(value, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS, strip=True)
+    return default_sanitizer.clean(value)
+
+
+def clean_many(values) -> list:
+    return default_sanitizer.clean_many(values)
 
 
 def clean_iframe(value: str) -> str:
@@ -0,0 +1,86 @@
+import re
+import json
+
+# Build-time product search index for exported sites.
+#
+# The index is plain JSON split into small files so the browser only downloads what a
+# query needs (templates/search.js.j2 is the client):
+#   search/index.json          counts + the shard file names below
+#   search/terms-<c>.json      {token: [doc ids]} for tokens starting with <c>
+#                              (a-z, 0-9; every other first character shares "_")
+#   search/docs-<n>.json       [[name, price, desc, img, href, price_value], ...]
+#                              for doc ids n*shard_size .. (n+1)*shard_size-1
+# Doc ids are positions in the feed, so results come back in catalog order.
+
+SEARCH_DIR = "search"
+INDEX_VERSION = 1
+DOCS_PER_SHARD = 500
+DESC_CHARS = 160
+_TOKEN = re.compile(r"\w+")
+_PRICE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased word tokens; single characters are kept only when they are digits."""
+    return [t for t in _TOKEN.findall((text or "").lower()) if len(t) > 1 or t.isdigit()]
+
+
+def shard_key(token: str) -> str:
+    c = token[0]
+    return c if ("a" <= c <= "z" or "0" <= c <= "9") else "_"
+
+
+def parse_price(text: str):
+    """First number in a price string ("₹1,250.50" -> 1250.5), or None."""
+    m = _PRICE.search(text or "")
+    if not m:
+        return None
+    try:
+        return float(m.group(0).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+class SearchIndex:
+    """Tokenized product records; files() serializes the shards described above."""
+
+    __slots__ = ("docs", "terms", "shard_size")
+
+    def __init__(self, products, links=None, shard_size: int = DOCS_PER_SHARD):
+        self.shard_size = max(1, shard_size)
+        self.docs = []
+        self.terms = {}
+        for i, p in enumerate(products):
+            desc = p.desc or ""
+            if len(desc) > DESC_CHARS:
+                desc = desc[: DESC_CHARS - 1].rstrip() + "…"
+            href = links[i] if links else ""
+            self.docs.append([p.name, p.price, desc, p.img, href, parse_price(p.price)])
+            for token in set(tokenize(f"{p.name} {p.price} {p.desc}")):
+                self.terms.setdefault(shard_key(token), {}).setdefault(token, []).append(i)
+
+    def files(self) -> list:
+        """[(site-relative path, bytes)] with the manifest first."""
+        doc_files = []
+        out = []
+        for n, start in enumerate(range(0, len(self.docs), self.shard_size)):
+            name = f"{SEARCH_DIR}/docs-{n}.json"
+            doc_files.append(name)
+            out.append((name, _dumps(self.docs[start : start + self.shard_size])))
+        term_files = {}
+        for key in sorted(self.terms):
+            name = f"{SEARCH_DIR}/terms-{key}.json"
+            term_files[key] = name
+            out.append((name, _dumps(self.terms[key])))
+        manifest = {
+            "version": INDEX_VERSION,
+            "count": len(self.docs),
+            "shard_size": self.shard_size,
+            "docs": doc_files,
+            "terms": term_files,
+        }
+        return [(f"{SEARCH_DIR}/index.json", _dumps(manifest))] + out
@@ -0,0 +1,424 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .sanitizer import sanitize_filename
+from .site_builder import SiteBuilder
+from .export import file_chunks
+from .instrumentation import MemoryCollector, RecordingCollector, replay
+
+# Local HTTP render service on top of SiteBuilder (standard library only).
+#
+#   python -m generator.service --port 8765 --workers 4 --queue 16
+#
+#   POST /render[?page=home|about]         body: context JSON -> text/html
+#   POST /zip[?minify=1&precompress=1&shared_assets=1]
+#                                          body: context JSON -> streamed application/zip
+#   GET  /healthz                          -> {"status": "ok", ...}
+#   GET  /metrics                          -> request counters + SiteBuilder stage timings
+#
+# Rendering and ZIP building run in a pool of `workers` processes, so CPU-bound work
+# runs in parallel outside the server's GIL; HTTP handler threads only parse requests
+# and write responses (ZIPs are built into a temp file by the worker, then streamed).
+# At most `workers` jobs run at once; up to `queue` more requests wait for a slot
+# (at most queue_timeout seconds). Anything beyond that is rejected straight away with
+# 503 + Retry-After. Open connections are capped too (max_connections), so a burst
+# can't pile up unbounded handler threads.
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE = 16
+DEFAULT_QUEUE_TIMEOUT = 30.0
+DEFAULT_MAX_CONNECTIONS = 64
+MAX_BODY_BYTES = 1 << 20
+PAGES = ("home", "about")
+
+
+class Overloaded(Exception):
+    pass
+
+
+# --- worker side (one SiteBuilder per process) ---
+_worker_builder = None
+_worker_records = None
+
+
+def _init_worker():
+    global _worker_builder, _worker_records
+    _worker_records = RecordingCollector()
+    _worker_builder = SiteBuilder(collector=_worker_records)
+
+
+def _render_job(context: dict, page: str):
+    """(html, stage records)"""
+    if _worker_builder is None:
+        _init_worker()
+    _worker_records.drain()
+    html = _worker_builder.render_about(context) if page == "about" else _worker_builder.render_home(context)
+    return html, _worker_records.drain()
+
+
+def _export_job(context: dict, path: str, options: dict):
+    """Write the site ZIP to path; returns stage records."""
+    if _worker_builder is None:
+        _init_worker()
+    _worker_records.drain()
+    with open(path, "wb") as fh:
+        _worker_builder.export(context, fh, **options)
+    return _worker_records.drain()
+
+
+class RenderService:
+    """
+    Admission control + a bounded executor for renders/exports; the HTTP handler
+    below only does I/O. By default jobs run in a ProcessPoolExecutor with one
+    SiteBuilder per worker process. Passing a builder runs jobs with that builder on
+    a ThreadPoolExecutor of the same size instead (in-process, still GIL-bound).
+    """
+
+    def __init__(
+        self,
+        builder: SiteBuilder = None,
+        workers: int = DEFAULT_WORKERS,
+        queue: int = DEFAULT_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        max_body: int = MAX_BODY_BYTES,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ):
+        self.collector = MemoryCollector()
+        self.builder = builder
+        self.workers = workers
+        self.executor = self._new_executor()
+        self._broken = False
+        self._pool_lock = threading.Lock()
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.max_body = max_body
+        self.max_connections = max_connections
+        self._admitted = threading.BoundedSemaphore(workers + queue)
+        self._running = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "ok": 0, "rejected": 0, "errors": 0, "in_flight": 0, "waiting": 0, "pool_restarts": 0}
+        self.started = time.time()
+
+    def _new_executor(self):
+        if self.builder is None:
+            return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+
+    def _submit(self, fn, *args):
+        """
+        Run fn on the executor and wait for it. A worker process that dies breaks the
+        whole ProcessPoolExecutor; it is replaced so later requests don't all fail.
+        The job that was running when it broke still raises.
+        """
+        executor = self.executor
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenExecutor:
+            executor = self._restart(executor)
+            future = executor.submit(fn, *args)
+        try:
+            return future.result()
+        except BrokenExecutor:
+            self._restart(executor)
+            raise
+
+    def _restart(self, broken):
+        with self._pool_lock:
+            if self.executor is broken:
+                # Stays set if a new pool can't be created, so /healthz reports it
+                self._broken = True
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.executor = self._new_executor()
+                self._broken = False
+                self._count(pool_restarts=1)
+            return self.executor
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self._counters[key] += delta
+
+    def slot(self):
+        """Context manager holding a worker slot; raises Overloaded when the queue is full or times out."""
+        service = self
+
+        class _Slot:
+            def __enter__(self):
+                if not service._admitted.acquire(blocking=False):
+                    service._count(rejected=1)
+                    raise Overloaded("queue full")
+                service._count(waiting=1)
+                acquired = service._running.acquire(timeout=service.queue_timeout)
+                service._count(waiting=-1)
+                if not acquired:
+                    service._admitted.release()
+                    service._count(rejected=1)
+                    raise Overloaded("timed out waiting for a worker")
+                service._count(in_flight=1)
+                return self
+
+            def __exit__(self, *exc):
+                service._count(in_flight=-1)
+                service._running.release()
+                service._admitted.release()
+
+        return _Slot()
+
+    def render(self, context: dict, page: str = "home") -> str:
+        """Render on the executor; call while holding slot() so the pool never queues."""
+        if self.builder is not None:
+            return self._submit(self.builder.render_about if page == "about" else self.builder.render_home, context)
+        html, records = self._submit(_render_job, context, page)
+        replay(records, self.collector)
+        return html
+
+    def export(self, context: dict, path: str, minify: bool = False, precompress: bool = False, shared_assets: bool = False):
+        """Build the site ZIP into the file at path on the executor."""
+        options = {"minify": minify, "precompress": precompress, "shared_assets": shared_assets}
+        if self.builder is not None:
+            def job():
+                with open(path, "wb") as fh:
+                    self.builder.export(context, fh, **options)
+
+            self._submit(job)
+            return
+        replay(self._submit(_export_job, context, path, options), self.collector)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def health(self) -> dict:
+        with self._lock:
+            in_flight, waiting = self._counters["in_flight"], self._counters["waiting"]
+            restarts = self._counters["pool_restarts"]
+        return {
+            "status": "broken" if self._broken else "ok",
+            "workers": self.workers,
+            "in_flight": in_flight,
+            "waiting": waiting,
+            "pool_restarts": restarts,
+        }
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "uptime_s": round(time.time() - self.started, 3),
+            "workers": self.workers,
+            "queue": self.queue,
+            "counters": counters,
+            # archive:<entry> rows would grow with every distinct file name
+            "stages": [row for row in self.collector.summary() if not row["stage"].startswith("archive:")],
+        }
+
+
+class ChunkedWriter:
+    """File-like sink writing HTTP/1.1 chunked transfer encoding (no seek/tell, as write_archive allows)."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, data) -> int:
+        if data:
+            self.wfile.write(b"%x\r\n" % len(data))
+            self.wfile.write(data)
+            self.wfile.write(b"\r\n")
+        return len(data)
+
+    def flush(self):
+        self.wfile.flush()
+
+    def close(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def _flag(query: dict, name: str) -> bool:
+    return query.get(name, [""])[0].lower() in ("1", "true", "yes")
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "TitanRender/1"
+    service = None  # set by make_server
+    _headers_sent = False
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/healthz":
+            health = self.service.health()
+            self._send_json(200 if health["status"] == "ok" else 503, health)
+        elif path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        # Handler instances live as long as a keep-alive connection
+        self._headers_sent = False
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path not in ("/render", "/zip"):
+            self._send_json(404, {"error": "not found"})
+            return
+        page = query.get("page", ["home"])[0]
+        if page not in PAGES:
+            self._send_json(400, {"error": f"unknown page: {page}"})
+            return
+        context = self._read_context()
+        if context is None:
+            return
+        self.service._count(requests=1)
+        try:
+            if url.path == "/render":
+                with self.service.slot():
+                    body = self.service.render(context, page).encode("utf-8")
+                # The worker slot is free before the (possibly slow) client reads the page
+                self._send(200, "text/html; charset=utf-8", body)
+            else:
+                self._stream_zip(context, _flag(query, "minify"), _flag(query, "precompress"), _flag(query, "shared_assets"))
+        except Overloaded as exc:
+            self._send_json(503, {"error": f"overloaded: {exc}"}, {"Retry-After": "1"})
+            return
+        except Exception as exc:
+            self.service._count(errors=1)
+            self.log_error("render failed: %s: %s", type(exc).__name__, exc)
+            if not self._headers_sent:
+                self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"})
+            else:
+                # Mid-stream failure: the client sees a truncated chunked body
+                self.close_connection = True
+            return
+        self.service._count(ok=1)
+
+    def _stream_zip(self, context: dict, minify: bool, precompress: bool, shared_assets: bool):
+        name = str(context.get("biz_name") or "site").strip() or "site"
+        fd, path = tempfile.mkstemp(prefix="titan-", suffix=".zip")
+        os.close(fd)
+        try:
+            # Built by a worker; failures (e.g. the product sheet) still get a proper 500
+            with self.service.slot():
+                self.service.export(context, path, minify=minify, precompress=precompress, shared_assets=shared_assets)
+            # The worker slot is free while the client downloads
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Disposition", 'attachment; filename="%s.zip"' % sanitize_filename(name.replace(" ", "_")))
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._headers_sent = True
+            sink = ChunkedWriter(self.wfile)
+            for chunk in file_chunks(path):
+                sink.write(chunk)
+            sink.close()
+        finally:
+            os.remove(path)
+
+    def _read_context(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return None
+        if length > self.service.max_body:
+            self.close_connection = True
+            self._send_json(413, {"error": f"context larger than {self.service.max_body} bytes"})
+            return None
+        try:
+            context = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as exc:
+            self._send_json(400, {"error": f"invalid JSON: {exc}"})
+            return None
+        if not isinstance(context, dict):
+            self._send_json(400, {"error": "context must be a JSON object"})
+            return None
+        return context
+
+    def _send(self, status: int, content_type: str, body: bytes, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self._headers_sent = True
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        self._send(status, "application/json", json.dumps(payload).encode("utf-8"), headers)
+
+
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with at most max_connections handler threads; extra connections get a bare 503."""
+
+    daemon_threads = True
+    max_connections = DEFAULT_MAX_CONNECTIONS
+
+    def server_activate(self):
+        super().server_activate()
+        self._connections = threading.BoundedSemaphore(self.max_connections)
+
+    def process_request(self, request, client_address):
+        if not self._connections.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._connections.release()
+
+
+def make_server(service: RenderService = None, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Build (not start) the HTTP server; call serve_forever() on the result, service.close() when done."""
+    service = service or RenderService()
+    handler = type("BoundRenderHandler", (RenderHandler,), {"service": service})
+    server_class = type("BoundServer", (BoundedThreadingHTTPServer,), {"max_connections": service.max_connections})
+    return server_class((host, port), handler)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m generator.service", description="HTTP render service for site previews and ZIPs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="render worker processes")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE, help="requests allowed to wait for a worker")
+    parser.add_argument("--queue-timeout", type=float, default=DEFAULT_QUEUE_TIMEOUT, help="seconds a request may wait")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS, help="open connections served at once")
+    args = parser.parse_args(argv)
+
+    service = RenderService(
+        workers=args.workers,
+        queue=args.queue,
+        queue_timeout=args.queue_timeout,
+        max_connections=args.max_connections,
+    )
+    httpd = make_server(service, args.host, args.port)
+    print(f"serving on http://{args.host}:{httpd.server_address[1]}", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
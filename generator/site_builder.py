@@ -1,87 +1,134 @@
 import os
 import io
-import zipfile
-import csv
-import json
 import re
-import requests
-from urllib.parse import quote_plus
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from .sanitizer import clean_html, clean_iframe, ensure_trailing_slash, sanitize_filename
+import hashlib
+import functools
+from .sanitizer import clean_html, clean_many, clean_iframe, ensure_trailing_slash, sanitize_filename
+from .context import PreparedContext, context_fingerprint
+from .catalog import CatalogLayout
+from .feed import FeedReader, ProductFeed
+from .templating import TEMPLATES_PATH, environment_from_env
+from .export import ArchiveEntry, DEFAULT_COMPRESSLEVEL, file_chunks, write_archive
+from .incremental import OUTPUT_VERSION, build_to_directory, fingerprint
+from .instrumentation import NULL_COLLECTOR, NullCollector, timed, timed_chunks
+from .optimize import PRECOMPRESS_FORMATS, optimize_entries
+from .sitemap import sitemap_entries
+from .search import SearchIndex
 
-# Determine templates path (repo templates/ folder)
-TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "templates")
-if not os.path.isdir(TEMPLATES_PATH):
-    TEMPLATES_PATH = os.path.join(os.getcwd(), "templates")
+# Shared template environment (see generator.templating for cache/precompile options)
+env = environment_from_env()
 
-env = Environment(loader=FileSystemLoader(TEMPLATES_PATH), autoescape=select_autoescape(["html", "xml"]))
-
-# Register a url encoding filter for templates (used for building WhatsApp links)
-env.filters["url_encode"] = lambda value: quote_plus(str(value)) if value is not None else ""
 
 class SiteBuilder:
-    def __init__(self):
-        self.env = env
+    def __init__(self, feed_cache=None, template_env=None, feed_reader=None, collector=None):
+        self.env = template_env if template_env is not None else env
+        # Templates are resolved once per builder
+        self._templates = {}
+        self._templates_fp = None
+        # Product feeds are cached (TTL + ETag/Last-Modified revalidation) across reruns;
+        # the default cache (and the HTTP stack behind it) is imported on first use
+        self._feed_cache = feed_cache
+        # Row/byte limits for product sheets
+        self.feed_reader = feed_reader if feed_reader is not None else FeedReader()
+        # Stage timings/counters (see generator.instrumentation)
+        self.collector = collector if collector is not None else NULL_COLLECTOR
+
+    @property
+    def feed_cache(self):
+        if self._feed_cache is None:
+            from .feed_cache import default_feed_cache
+
+            self._feed_cache = default_feed_cache
+        return self._feed_cache
+
+    def prepare(self, context) -> PreparedContext:
+        """
+        Sanitize and resolve a context once (including the product sheet fetch).
+        The result can be passed to any number of render_* / build_zip calls.
+        """
+        if isinstance(context, PreparedContext):
+            return context
+        return PreparedContext(self._sanitize_context(context))
 
-    def render_home(self, context: dict, is_home: bool = False) -> str:
-        ctx = self._sanitize_context(context)
-        tpl = self.env.get_template("index.html.j2")
-        return tpl.render(**ctx)
+    def render_home(self, context, is_home: bool = False) -> str:
+        ctx = self.prepare(context)
+        return self._render("index.html.j2", ctx, **CatalogLayout(ctx).home_vars())
 
-    def render_about(self, context: dict) -> str:
-        ctx = self._sanitize_context(context)
-        tpl = self.env.get_template("about.html.j2")
-        return tpl.render(**ctx)
+    def render_about(self, context) -> str:
+        return self._render("about.html.j2", self.prepare(context))
+
+    def _render(self, name: str, ctx: PreparedContext, **extra) -> str:
+        with timed(self.collector, f"render:{name}") as counters:
+            html = self._template(name).render(ctx, **extra)
+            if not isinstance(self.collector, NullCollector):
+                # Encoding copies the page; only pay for it when someone is listening
+                counters["bytes_out"] = len(html.encode("utf-8"))
+        return html
+
+    def _generate(self, name: str, ctx: PreparedContext, **extra):
+        """Streamed render; time is recorded as the chunks are consumed."""
+        return timed_chunks(self.collector, f"render:{name}", self._template(name).generate(ctx, **extra))
+
+    def _template(self, name: str):
+        tpl = self._templates.get(name)
+        if tpl is None:
+            tpl = self._templates[name] = self.env.get_template(name)
+        return tpl
 
     def _sanitize_context(self, context: dict) -> dict:
-        out = dict(context)
+        # "sanitize" covers field cleaning; the sheet download is its own "feed.fetch" stage
+        with timed(self.collector, "sanitize"):
+            out = dict(context)
 
-        # Clean text/html fields
-        for k in ["about_txt", "seo_d", "hero_h", "biz_name", "biz_addr", "biz_email", "biz_cat", "priv_body", "terms_body"]:
-            if out.get(k):
-                out[k] = clean_html(str(out.get(k)))
+            # Clean text/html fields
+            for k in ["about_txt", "seo_d", "hero_h", "biz_name", "biz_addr", "biz_email", "biz_cat", "priv_body", "terms_body"]:
+                if out.get(k):
+                    out[k] = clean_html(str(out.get(k)))
 
-        # sanitize iframe
-        out["map_iframe"] = clean_iframe(out.get("map_iframe", ""))
+            # sanitize iframe
+            out["map_iframe"] = clean_iframe(out.get("map_iframe", ""))
 
-        # ensure prod_url trailing slash for sitemap/robots
-        out["prod_url"] = ensure_trailing_slash(out.get("prod_url", ""))
+            # ensure prod_url trailing slash for sitemap/robots
+            out["prod_url"] = ensure_trailing_slash(out.get("prod_url", ""))
 
-        # Clean service list entries
-        out["biz_serv"] = [clean_html(s) for s in out.get("biz_serv", [])]
+            # Clean service list entries
+            out["biz_serv"] = clean_many(str(s) for s in out.get("biz_serv", []))
 
-        # Default image fallbacks
-        out.setdefault(
-            "custom_hero",
-            out.get("custom_hero")
-            or "https://images.unsplash.com/photo-1519741497674-611481863552?auto=format&fit=crop&q=80&w=1600",
-        )
-        out.setdefault(
-            "custom_feat",
-            out.get("custom_feat")
-            or "https://images.unsplash.com/photo-1511795409834-ef04bbd61622?auto=format&fit=crop&q=80&w=800",
-        )
-        out.setdefault(
-            "custom_gall",
-            out.get("custom_gall")
-            or "https://images.unsplash.com/photo-1532712938310-34cb3982ef74?auto=format&fit=crop&q=80&w=1600",
-        )
+            # Default image fallbacks
+            out.setdefault(
+                "custom_hero",
+                out.get("custom_hero")
+                or "https://images.unsplash.com/photo-1519741497674-611481863552?auto=format&fit=crop&q=80&w=1600",
+            )
+            out.setdefault(
+                "custom_feat",
+                out.get("custom_feat")
+                or "https://images.unsplash.com/photo-1511795409834-ef04bbd61622?auto=format&fit=crop&q=80&w=800",
+            )
+            out.setdefault(
+                "custom_gall",
+                out.get("custom_gall")
+                or "https://images.unsplash.com/photo-1532712938310-34cb3982ef74?auto=format&fit=crop&q=80&w=1600",
+            )
 
-        # Derive a cleaned phone used for WhatsApp links (digits and optional leading country code)
-        biz_phone = (out.get("biz_phone") or "").strip()
-        phone_digits = re.sub(r"[^\d+]", "", biz_phone)
-        # For wa link, we remove the plus sign (wa.me expects number without plus)
-        out["biz_phone_wa"] = phone_digits.lstrip("+")
+            # Derive a cleaned phone used for WhatsApp links (digits and optional leading country code)
+            biz_phone = (out.get("biz_phone") or "").strip()
+            phone_digits = re.sub(r"[^\d+]", "", biz_phone)
+            # For wa link, we remove the plus sign (wa.me expects number without plus)
+            out["biz_phone_wa"] = phone_digits.lstrip("+")
 
         # Parse products server-side (if sheet_url provided)
         sheet_url = out.get("sheet_url") or ""
         out["products"] = []
+        out["feed_errors"] = []
         if sheet_url:
             try:
-                products = self._fetch_products_from_sheet(sheet_url)
-                out["products"] = products
-            except Exception:
+                feed = self._fetch_feed(sheet_url)
+                out["products"] = list(feed.products)
+                out["feed_errors"] = [str(e) for e in feed.errors]
+            except Exception as exc:
                 out["products"] = []
+                out["feed_errors"] = [f"could not load product sheet: {type(exc).__name__}: {exc}"]
 
         # Provide sanitized privacy/terms html for modal consumption
         out["privacy_html"] = out.get("priv_body", "")
@@ -95,69 +142,237 @@ class SiteBuilder:
     def _fetch_products_from_sheet(self, sheet_url: str):
         """
         Fetch CSV from a Google Sheets link or any CSV/pipe-delimited link.
-        Returns a list of product dicts with keys: name, price, desc, img.
+        Returns a tuple of Product records (name, price, desc, img, images).
         Tries to auto-convert google edit URLs to export=csv.
         """
-        url = sheet_url.strip()
-        # Convert common Google Sheets edit URL to export CSV
-        if "docs.google.com/spreadsheets" in url:
-            # If it's the /edit or /edit#gid=... form, convert
-            url = re.sub(r"/edit.*$", "/export?format=csv", url)
-
-        resp = requests.get(url, timeout=8)
-        resp.raise_for_status()
-        text = resp.text
-
-        # Use csv.Sniffer to detect delimiter; if fails fallback to '|' or ','
-        dialect = None
-        try:
-            sniffer = csv.Sniffer()
-            dialect = sniffer.sniff(text.splitlines()[0] if text else ",")
-            delim = dialect.delimiter
-        except Exception:
-            # Heuristic: if pipe found in first few lines use pipe else comma
-            first_chunk = "\n".join(text.splitlines()[:5])
-            delim = "|" if "|" in first_chunk and first_chunk.count("|") >= 1 else ","
-
-        reader = csv.reader(text.splitlines(), delimiter=delim)
-        rows = [r for r in reader if any(cell.strip() for cell in r)]
-        products = []
-        # If header present, detect and skip
-        start = 0
-        if rows:
-            header = [c.strip().lower() for c in rows[0]]
-            if any(h in ("name", "service_name", "product", "title") for h in header):
-                start = 1
-
-        for r in rows[start:]:
-            # Normalize row to at least 4 columns
-            name = r[0].strip() if len(r) > 0 else ""
-            price = r[1].strip() if len(r) > 1 else ""
-            desc = r[2].strip() if len(r) > 2 else ""
-            img = r[3].strip() if len(r) > 3 else ""
-            # If image looks like a Google Drive link, try to normalize (best-effort)
-            products.append({"name": name, "price": price, "desc": desc, "img": img})
-        return products
-
-    def build_zip(self, context: dict, output_io: io.BytesIO):
-        ctx = self._sanitize_context(context)
-        with zipfile.ZipFile(output_io, "w", zipfile.ZIP_DEFLATED) as zf:
-            index = self.env.get_template("index.html.j2").render(**ctx)
-            about = self.env.get_template("about.html.j2").render(**ctx)
-            contact = self.env.get_template("about.html.j2").render(**ctx)
-
-            zf.writestr("index.html", index)
-            zf.writestr("about.html", about)
-            zf.writestr("contact.html", contact)
-            zf.writestr("privacy.html", self._wrap_basic("Privacy Policy", ctx.get("privacy_html", "")))
-            zf.writestr("terms.html", self._wrap_basic("Terms & Conditions", ctx.get("terms_html", "")))
-            zf.writestr("404.html", self._wrap_basic("404 - Not Found", "<h1>404</h1><p>Not Found</p>"))
-            zf.writestr("robots.txt", f"User-agent: *\nAllow: /\nSitemap: {ctx.get('prod_url', '')}sitemap.xml")
-            zf.writestr(
-                "sitemap.xml",
-                f"<?xml version='1.0' encoding='UTF-8'?><urlset xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'><url><loc>{ctx.get('prod_url','')}index.html</loc></url><url><loc>{ctx.get('prod_url','')}about.html</loc></url></urlset>",
+        return self._fetch_feed(sheet_url).products
+
+    def _fetch_feed(self, sheet_url: str) -> ProductFeed:
+        """
+        Fetch and parse a product sheet, keeping row errors and truncation info.
+        Results are served from self.feed_cache while the sheet is unchanged.
+        """
+        with timed(self.collector, "feed.fetch") as counters:
+            feed = self.feed_cache.get(sheet_url, self.feed_reader.read_response)
+            counters["products"] = len(feed.products)
+            counters["errors"] = len(feed.errors)
+        return feed
+
+    def iter_site_entries(self, context, bundler=None, shared_assets: bool = False):
+        """
+        Yield the ArchiveEntry objects of an exported site in archive order.
+        Entry bodies are produced lazily, only when an entry is written, and every
+        entry carries a fingerprint of its inputs (see generator.incremental).
+        bundler: optional generator.assets.AssetBundler; referenced images are then
+        shipped in the archive and pages point at the local webp variants.
+        shared_assets: link one styles.<hash>.css instead of inlining the stylesheet,
+        and load privacy/terms text from their pages when the modal opens.
+        """
+        ctx = self.prepare(context)
+        images = []
+        if bundler is not None:
+            ctx, images = self._bundle_assets(ctx, bundler)
+        catalog = CatalogLayout(ctx)
+        stylesheet = None
+        if shared_assets:
+            stylesheet, ctx = self._shared_stylesheet(ctx)
+        search_files = []
+        if ctx.get("product_search") and catalog.products:
+            search_files, ctx = self._search_index(ctx, catalog)
+        prod_url = ctx.get("prod_url", "")
+        templates = self.templates_fingerprint()
+
+        def page(name):
+            return fingerprint(OUTPUT_VERSION, templates, name, ctx.digest)
+
+        def basic(name, title, body, clean=True):
+            return ArchiveEntry(
+                name, lambda: self._wrap_basic(title, body, clean), fingerprint=fingerprint(OUTPUT_VERSION, name, title, body)
+            )
+
+        about = []
+
+        def render_about():
+            # contact page currently shares the about template; render it once
+            if not about:
+                about.append(self._render("about.html.j2", ctx))
+            return about[0]
+
+        if stylesheet is not None:
+            yield stylesheet
+        yield ArchiveEntry("index.html", lambda: self._generate("index.html.j2", ctx, **catalog.home_vars()), fingerprint=page("index.html"))
+        yield ArchiveEntry("about.html", render_about, fingerprint=page("about.html"))
+        yield ArchiveEntry("contact.html", render_about, fingerprint=page("about.html"))
+        yield basic("privacy.html", "Privacy Policy", ctx.get("privacy_html", ""))
+        yield basic("terms.html", "Terms & Conditions", ctx.get("terms_html", ""))
+        yield basic("404.html", "404 - Not Found", "<h1>404</h1><p>Not Found</p>", clean=False)
+        yield ArchiveEntry(
+            "robots.txt",
+            f"User-agent: *\nAllow: /\nSitemap: {prod_url}sitemap.xml",
+            fingerprint=fingerprint(OUTPUT_VERSION, "robots.txt", prod_url),
+        )
+        for n in range(1, catalog.pages + 1):
+            yield self._inventory_entry(ctx, catalog, n, page)
+        if catalog.links:
+            yield from self._product_entries(ctx, catalog, templates)
+        paths = ["index.html", "about.html"] + catalog.page_paths()
+        yield from sitemap_entries(prod_url, paths, fingerprint=fingerprint(OUTPUT_VERSION, "sitemap.xml", prod_url, *paths))
+        yield from search_files
+        for image in images:
+            for _, name, source in image.files:
+                # Variant names embed the URL + transform cache key
+                data = source if isinstance(source, bytes) else functools.partial(file_chunks, source)
+                yield ArchiveEntry(name, data, fingerprint=fingerprint(OUTPUT_VERSION, name))
+
+    def _shared_stylesheet(self, ctx):
+        """(styles.<hash>.css entry, ctx with the page variables pointing at it)."""
+        css = self._render("styles.css.j2", ctx).strip() + "\n"
+        name = f"styles.{hashlib.sha256(css.encode('utf-8')).hexdigest()[:10]}.css"
+        # The name is the content hash; unchanged styles keep their URL and browser cache entry
+        entry = ArchiveEntry(name, css, fingerprint=fingerprint(OUTPUT_VERSION, name))
+        return entry, PreparedContext(dict(ctx, stylesheet_href=name, legal_lazy=True))
+
+    def _search_index(self, ctx, catalog):
+        """(search script + index shard entries, ctx with the page variables pointing at them)."""
+        with timed(self.collector, "search.index") as counters:
+            files = SearchIndex(catalog.products, catalog.links).files()
+            counters.update(products=len(catalog.products), files=len(files), bytes_out=sum(len(data) for _, data in files))
+        script = self._render("search.js.j2", ctx)
+        script_name = f"search.{hashlib.sha256(script.encode('utf-8')).hexdigest()[:10]}.js"
+        entries = [ArchiveEntry(script_name, script, fingerprint=fingerprint(OUTPUT_VERSION, script_name))]
+        for name, data in files:
+            entries.append(ArchiveEntry(name, data, fingerprint=fingerprint(OUTPUT_VERSION, name, hashlib.sha256(data).hexdigest())))
+        return entries, PreparedContext(dict(ctx, search_index_href=files[0][0], search_script_href=script_name))
+
+    def _inventory_entry(self, ctx, catalog, n: int, page) -> ArchiveEntry:
+        name = catalog.inventory_vars(n)["canonical_path"]
+        return ArchiveEntry(name, lambda: self._generate("inventory.html.j2", ctx, **catalog.inventory_vars(n)), fingerprint=page(name))
+
+    def _product_entries(self, ctx, catalog, templates: str):
+        # Detail pages depend on the site fields and their own product only, so an
+        # incremental build rewrites just the products that changed
+        site = context_fingerprint({k: v for k, v in ctx.items() if k not in ("products", "feed_errors")})
+        for i, (product, name) in enumerate(zip(catalog.products, catalog.links)):
+            extra = {
+                "product": product,
+                "back_href": catalog.back_href(i),
+                "page_title": product.name,
+                "canonical_path": name,
+            }
+            yield ArchiveEntry(
+                name,
+                lambda extra=extra: self._generate("product.html.j2", ctx, **extra),
+                fingerprint=fingerprint(OUTPUT_VERSION, templates, site, name, extra["back_href"], context_fingerprint(product.to_dict())),
+            )
+
+    def templates_fingerprint(self) -> str:
+        """Hash of every template source; changes whenever any template changes."""
+        if self._templates_fp is None:
+            parts = []
+            try:
+                for name in self.env.list_templates():
+                    source, _, _ = self.env.loader.get_source(self.env, name)
+                    parts.append(name + "\0" + source)
+            except (TypeError, AttributeError):
+                # Loaders that can't list sources (e.g. compiled-only); fall back to the compiled modules' identity
+                parts = [repr(self._template(n).filename) for n in ("index.html.j2", "about.html.j2")]
+            self._templates_fp = fingerprint(*parts)
+        return self._templates_fp
+
+    def export(
+        self,
+        context,
+        sink,
+        compresslevel: int = DEFAULT_COMPRESSLEVEL,
+        date_time=None,
+        bundler=None,
+        minify: bool = False,
+        precompress: bool = False,
+        shared_assets: bool = False,
+    ) -> int:
+        """
+        Stream the site archive into sink (any object with write(); need not be seekable).
+        Images are stored, text is deflated at compresslevel, timestamps are fixed.
+        minify: minify HTML and inline CSS/JS. precompress: add .gz/.br siblings.
+        shared_assets: see iter_site_entries.
+        """
+        entries = self.iter_site_entries(context, bundler=bundler, shared_assets=shared_assets)
+        if minify or precompress:
+            entries = optimize_entries(
+                entries,
+                minify_text=minify,
+                precompress_formats=PRECOMPRESS_FORMATS if precompress else (),
+                collector=self.collector,
             )
+        with timed(self.collector, "export") as counters:
+            sizes = [0, 0]
+
+            def on_entry(name, seconds, bytes_in, bytes_out):
+                sizes[0] += bytes_in
+                sizes[1] += bytes_out
+                self.collector.record(f"archive:{name}", seconds, bytes_in=bytes_in, bytes_out=bytes_out)
+
+            count = write_archive(entries, sink, compresslevel=compresslevel, date_time=date_time, on_entry=on_entry)
+            counters.update(entries=count, bytes_in=sizes[0], bytes_out=sizes[1])
+        return count
+
+    def build_zip(self, context, output_io: io.BytesIO, bundler=None, minify: bool = False, precompress: bool = False, shared_assets: bool = False):
+        self.export(context, output_io, bundler=bundler, minify=minify, precompress=precompress, shared_assets=shared_assets)
+
+    def export_dir(
+        self,
+        context,
+        out_dir: str,
+        bundler=None,
+        minify: bool = False,
+        precompress: bool = False,
+        prune: bool = True,
+        shared_assets: bool = False,
+    ):
+        """
+        Incrementally export the site into out_dir (e.g. a GitHub Pages checkout).
+        Only entries whose inputs changed are rendered, only changed files are
+        written; returns a generator.incremental.BuildReport.
+        """
+        entries = self.iter_site_entries(context, bundler=bundler, shared_assets=shared_assets)
+        with timed(self.collector, "export_dir") as counters:
+            report = build_to_directory(
+                entries,
+                out_dir,
+                minify=minify,
+                precompress=precompress,
+                prune=prune,
+                collector=self.collector,
+            )
+            counters.update(written=len(report.written), unchanged=len(report.unchanged), removed=len(report.removed))
+        return report
+
+    def _bundle_assets(self, ctx: PreparedContext, bundler):
+        """Fetch referenced images and return (rewritten context, bundled images)."""
+        products = ctx.get("products") or ()
+        urls = [ctx.get(field) for field in bundler.fields] + [p.img for p in products]
+        with timed(self.collector, "assets.bundle") as counters:
+            bundled = bundler.bundle(urls)
+            counters["images"] = len(bundled)
+        if not bundled:
+            return ctx, []
+        data = ctx.to_dict()
+        for field in bundler.fields:
+            image = bundled.get(data.get(field))
+            if image is not None:
+                data[field] = image.src
+                data[field + "_srcset"] = image.srcset
+        rewritten = []
+        for product in data.get("products") or []:
+            image = bundled.get(product.img)
+            if image is not None:
+                product = product.replace(img=image.src, img_srcset=image.srcset)
+            rewritten.append(product)
+        data["products"] = rewritten
+        return PreparedContext(data), list(bundled.values())
 
-    def _wrap_basic(self, title: str, body_html: str) -> str:
-        body_safe = clean_html(body_html or "")
+    def _wrap_basic(self, title: str, body_html: str, clean: bool = True) -> str:
+        # A PreparedContext can be built directly, without prepare(); clean again (cached, cheap).
+        # clean=False is only for literal bodies written here.
+        body_safe = clean_html(body_html or "") if clean else body_html
         return f"""<!doctype html><html><head><meta charset="utf-8"><title>{title}</title></head><body><main><h1>{title}</h1><div>{body_safe}</div></main></body></html>"""
@@ -0,0 +1,53 @@
+from .export import ArchiveEntry
+
+# Streamed sitemaps. Up to max_urls pages get a single sitemap.xml <urlset>; larger
+# sites get sitemap.xml as a <sitemapindex> pointing at sitemap-1.xml, sitemap-2.xml,
+# ... shards of at most max_urls URLs each (the sitemaps.org limit is 50,000).
+# Bodies are generated chunk by chunk when the entry is written.
+
+SITEMAP_MAX_URLS = 50000
+XML_HEADER = "<?xml version='1.0' encoding='UTF-8'?>"
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+# URLs per yielded chunk
+_BATCH = 1000
+
+
+def escape(text: str) -> str:
+    # Same as xml.sax.saxutils.escape, without importing the xml/urllib stack
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def iter_urlset(base_url: str, paths):
+    yield f"{XML_HEADER}<urlset xmlns='{SITEMAP_NS}'>"
+    base = escape(base_url)
+    batch = []
+    for path in paths:
+        batch.append(f"<url><loc>{base}{escape(path)}</loc></url>")
+        if len(batch) >= _BATCH:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+    yield "</urlset>"
+
+
+def iter_sitemap_index(base_url: str, names):
+    yield f"{XML_HEADER}<sitemapindex xmlns='{SITEMAP_NS}'>"
+    base = escape(base_url)
+    for name in names:
+        yield f"<sitemap><loc>{base}{escape(name)}</loc></sitemap>"
+    yield "</sitemapindex>"
+
+
+def sitemap_entries(base_url: str, paths, max_urls: int = SITEMAP_MAX_URLS, fingerprint: str = None) -> list:
+    """ArchiveEntry objects (lazy bodies) for the site-relative page paths."""
+    paths = list(paths)
+    if len(paths) <= max_urls:
+        return [ArchiveEntry("sitemap.xml", lambda: iter_urlset(base_url, paths), fingerprint=fingerprint)]
+    shards = [paths[i : i + max_urls] for i in range(0, len(paths), max_urls)]
+    names = [f"sitemap-{n}.xml" for n in range(1, len(shards) + 1)]
+    entries = [ArchiveEntry("sitemap.xml", lambda: iter_sitemap_index(base_url, names), fingerprint=fingerprint)]
+    for name, shard in zip(names, shards):
+        # Bind the shard now; the lambda runs later
+        entries.append(ArchiveEntry(name, lambda shard=shard: iter_urlset(base_url, shard), fingerprint=fingerprint))
+    return entries
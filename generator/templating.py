@@ -0,0 +1,106 @@
+import os
+import sys
+import argparse
+from urllib.parse import quote_plus
+from jinja2 import (
+    ChoiceLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    ModuleLoader,
+    select_autoescape,
+)
+
+# Jinja environment factory.
+#
+# Short-lived processes (batch workers, Streamlit cold starts) can skip lexing and
+# parsing the templates by either:
+#   - a persistent bytecode cache directory (TITAN_TEMPLATE_CACHE_DIR), or
+#   - templates precompiled into importable modules:
+#       python -m generator.templating compile build/compiled_templates
+#     and then TITAN_COMPILED_TEMPLATES=build/compiled_templates
+# TITAN_TEMPLATE_AUTO_RELOAD=0 disables the per-render mtime check (production mode).
+
+# Determine templates path (repo templates/ folder)
+TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "templates")
+if not os.path.isdir(TEMPLATES_PATH):
+    TEMPLATES_PATH = os.path.join(os.getcwd(), "templates")
+
+
+def url_encode(value) -> str:
+    # Used for building WhatsApp links
+    return quote_plus(str(value)) if value is not None else ""
+
+
+def create_environment(
+    templates_path: str = TEMPLATES_PATH,
+    bytecode_cache_dir: str = None,
+    compiled_path: str = None,
+    auto_reload: bool = True,
+) -> Environment:
+    """
+    Build the template Environment.
+    compiled_path: directory produced by compile_templates(); tried before templates_path.
+    templates_path: None disables the source loader (compiled templates only).
+    """
+    loaders = []
+    if compiled_path:
+        loaders.append(ModuleLoader(compiled_path))
+    if templates_path:
+        loaders.append(FileSystemLoader(templates_path))
+    if not loaders:
+        raise ValueError("either templates_path or compiled_path is required")
+
+    bcc = None
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        bcc = FileSystemBytecodeCache(bytecode_cache_dir)
+
+    env = Environment(
+        loader=loaders[0] if len(loaders) == 1 else ChoiceLoader(loaders),
+        autoescape=select_autoescape(["html", "xml"]),
+        bytecode_cache=bcc,
+        auto_reload=auto_reload,
+    )
+    env.filters["url_encode"] = url_encode
+    return env
+
+
+def environment_from_env() -> Environment:
+    """Environment configured from TITAN_* environment variables (see module comment)."""
+    return create_environment(
+        bytecode_cache_dir=os.environ.get("TITAN_TEMPLATE_CACHE_DIR") or None,
+        compiled_path=os.environ.get("TITAN_COMPILED_TEMPLATES") or None,
+        auto_reload=os.environ.get("TITAN_TEMPLATE_AUTO_RELOAD", "1") != "0",
+    )
+
+
+def compile_templates(target: str, templates_path: str = TEMPLATES_PATH) -> str:
+    """Precompile every *.j2 template into Python modules under target."""
+    env = create_environment(templates_path=templates_path)
+    os.makedirs(target, exist_ok=True)
+    env.compile_templates(
+        target,
+        filter_func=lambda name: name.endswith(".j2"),
+        zip=None,
+        ignore_errors=False,
+    )
+    return target
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m generator.templating")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_compile = sub.add_parser("compile", help="precompile templates into importable modules")
+    p_compile.add_argument("target", help="output directory")
+    p_compile.add_argument("--templates", default=TEMPLATES_PATH, help="template source directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        compile_templates(args.target, templates_path=args.templates)
+        print(args.target)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import io
+import zipfile
+import pytest
+from PIL import Image
+from generator.assets import AssetBundler
+from generator.site_builder import SiteBuilder
+
+
+def jpeg_bytes(width=2000, height=1000):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+class FakeImageClient:
+    def __init__(self):
+        self.calls = []
+
+    def get_bytes(self, url, timeout=None):
+        self.calls.append(url)
+        if "missing" in url:
+            raise OSError("not found")
+        return jpeg_bytes(700, 350) if "small" in url else jpeg_bytes()
+
+
+@pytest.fixture
+def image_server():
+    return FakeImageClient()
+
+
+def test_bundle_produces_webp_variants_without_upscaling(image_server):
+    bundled = AssetBundler(widths=(480, 960), client=image_server).bundle(
+        ["https://img.test/big.jpg", "https://img.test/small.jpg", "https://img.test/missing.jpg", "https://img.test/big.jpg"]
+    )
+    assert set(bundled) == {"https://img.test/big.jpg", "https://img.test/small.jpg"}
+    assert [w for w, _, _ in bundled["https://img.test/big.jpg"].files] == [480, 960]
+    assert [w for w, _, _ in bundled["https://img.test/small.jpg"].files] == [480, 700]
+    _, name, data = bundled["https://img.test/big.jpg"].files[0]
+    assert name.startswith("assets/img/") and name.endswith("-480.webp")
+    assert Image.open(io.BytesIO(data)).size == (480, 240)
+
+
+def test_disk_cache_skips_download_and_encode(image_server, tmp_path):
+    url = "https://img.test/big.jpg"
+    first = AssetBundler(cache_dir=str(tmp_path), client=image_server).bundle([url])[url]
+    second = AssetBundler(cache_dir=str(tmp_path), client=image_server).bundle([url])[url]
+    assert image_server.calls == [url]
+    assert second.srcset == first.srcset
+    assert AssetBundler(quality=50).cache_key(url) != AssetBundler().cache_key(url)
+
+
+def test_build_zip_bundles_and_rewrites_images(image_server):
+    ctx = {"biz_name": "Img Co", "custom_gall": "https://img.test/big.jpg"}
+    buf = io.BytesIO()
+    SiteBuilder().build_zip(ctx, buf, bundler=AssetBundler(widths=(480, 960), client=image_server))
+    with zipfile.ZipFile(buf) as zf:
+        names = zf.namelist()
+        about = zf.read("about.html").decode("utf-8")
+    images = [n for n in names if n.startswith("assets/img/")]
+    assert len(images) == 2 + 2 * 2  # default hero/feature images too
+    assert "https://img.test/big.jpg" not in about
+    assert 'srcset="assets/img/' in about
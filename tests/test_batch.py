@@ -0,0 +1,82 @@
+import json
+import zipfile
+import pytest
+from generator import batch
+
+
+def write_jobs(path, records):
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n", encoding="utf-8")
+
+
+def test_load_jobs_from_csv_splits_list_fields(tmp_path):
+    jobs_file = tmp_path / "jobs.csv"
+    jobs_file.write_text('id,biz_name,biz_serv,area_list\nacme,Acme,"One\nTwo","North, South"\n', encoding="utf-8")
+    assert batch.load_jobs(str(jobs_file)) == [
+        ("acme", {"biz_name": "Acme", "biz_serv": ["One", "Two"], "area_list": ["North", "South"]})
+    ]
+
+
+def test_load_jobs_rejects_ids_with_the_same_output_name(tmp_path):
+    jobs_file = tmp_path / "jobs.jsonl"
+    write_jobs(jobs_file, [{"id": "a b", "biz_name": "A"}, {"id": "a_b", "biz_name": "B"}])
+    with pytest.raises(ValueError, match="duplicate job id: a_b"):
+        batch.load_jobs(str(jobs_file))
+
+
+def test_run_batch_builds_zips_in_parallel(tmp_path):
+    jobs_file = tmp_path / "jobs.jsonl"
+    write_jobs(jobs_file, [{"biz_name": f"Site {n}", "biz_serv": ["One"]} for n in range(3)])
+    out = tmp_path / "out"
+
+    results = batch.run_batch(str(jobs_file), str(out), workers=2)
+
+    assert sorted(r["job_id"] for r in results) == ["job-00001", "job-00002", "job-00003"]
+    assert all(r["status"] == "ok" for r in results)
+    with zipfile.ZipFile(out / "job-00002.zip") as zf:
+        assert "Site 1" in zf.read("index.html").decode("utf-8")
+    assert len(batch.load_report(str(out / batch.REPORT_NAME))) == 3
+
+
+def test_run_batch_resumes_after_failure(tmp_path, monkeypatch):
+    jobs_file = tmp_path / "jobs.jsonl"
+    write_jobs(jobs_file, [{"job_id": "good", "biz_name": "Good"}, {"job_id": "bad", "biz_name": "Bad"}])
+    out = tmp_path / "out"
+
+    from generator.site_builder import SiteBuilder
+
+    original = SiteBuilder.build_zip
+
+    def flaky(self, context, output_io, **kwargs):
+        if context.get("biz_name") == "Bad":
+            raise RuntimeError("sheet unavailable")
+        return original(self, context, output_io, **kwargs)
+
+    monkeypatch.setattr(SiteBuilder, "build_zip", flaky)
+    first = {r["job_id"]: r for r in batch.run_batch(str(jobs_file), str(out), workers=1)}
+    assert first["good"]["status"] == "ok"
+    assert first["bad"]["status"] == "error"
+    assert "sheet unavailable" in first["bad"]["error"]
+    assert not (out / "bad.zip").exists()
+
+    monkeypatch.setattr(SiteBuilder, "build_zip", original)
+    second = {r["job_id"]: r for r in batch.run_batch(str(jobs_file), str(out), workers=1)}
+    assert second["good"]["status"] == "skipped"
+    assert second["bad"]["status"] == "ok"
+
+    # An edited job is rebuilt even though its previous result was ok
+    write_jobs(jobs_file, [{"job_id": "good", "biz_name": "Good v2"}, {"job_id": "bad", "biz_name": "Bad"}])
+    third = {r["job_id"]: r for r in batch.run_batch(str(jobs_file), str(out), workers=1)}
+    assert third["good"]["status"] == "ok" and third["bad"]["status"] == "skipped"
+    with zipfile.ZipFile(out / "good.zip") as zf:
+        assert "Good v2" in zf.read("index.html").decode("utf-8")
+
+
+def test_run_batch_directories_mode_is_incremental(tmp_path):
+    jobs = tmp_path / "jobs.jsonl"
+    write_jobs(jobs, [{"job_id": "a", "biz_name": "Alpha"}])
+    out = tmp_path / "out"
+    first = batch.run_batch(str(jobs), str(out), workers=1, directories=True)
+    second = batch.run_batch(str(jobs), str(out), workers=1, directories=True)
+    assert first[0]["status"] == second[0]["status"] == "ok"
+    assert first[0]["written"] > 0 and second[0]["written"] == 0
+    assert (out / "a" / "index.html").exists()
@@ -0,0 +1,14 @@
+from benchmarks import run
+
+
+def test_suite_runs_offline_and_compare_flags_regressions():
+    results = run.run_suite(sizes=[5], repeat=1)
+    assert {"sanitize_context", "fetch_products[5]", "render_home[5]", "build_zip[5]", "import[generator.site_builder]"} <= set(results["results"])
+    assert all(r["median_s"] > 0 for r in results["results"].values())
+    assert all(r["peak_kb"] >= 0 for name, r in results["results"].items() if not name.startswith("import["))
+
+    slower = {"results": {k: dict(v, median_s=v["median_s"] * 2 + 1) for k, v in results["results"].items()}}
+    _, regressions = run.compare(slower, results, threshold=0.15)
+    assert set(regressions) == set(results["results"])
+    _, regressions = run.compare(results, slower)
+    assert regressions == []
@@ -23,3 +23,55 @@ def test_render_contains_business_name():
     html = builder.render_home(ctx, is_home=True)
     assert "Test Co" in html
     assert "Hello" in html
+
+
+def test_prepared_context_is_sanitized_once_and_reusable(monkeypatch):
+    import io
+    import zipfile
+    from generator.context import PreparedContext
+
+    builder = SiteBuilder()
+    calls = []
+    original = builder._sanitize_context
+    monkeypatch.setattr(builder, "_sanitize_context", lambda ctx: calls.append(1) or original(ctx))
+
+    ctx = {"biz_name": "Test Co", "biz_serv": ["One"], "about_txt": "<script>x</script><p>About</p>"}
+    prepared = builder.prepare(ctx)
+    assert isinstance(prepared, PreparedContext)
+    assert prepared["biz_serv"] == ("One",)
+    assert "<script>" not in prepared["about_txt"]
+
+    builder.render_home(prepared)
+    builder.render_about(prepared)
+    buf = io.BytesIO()
+    builder.build_zip(prepared, buf)
+    assert calls == [1]
+    with zipfile.ZipFile(buf) as zf:
+        assert zf.read("contact.html") == zf.read("about.html")
+
+    assert prepared == builder.prepare(dict(ctx))
+    assert hash(prepared) == hash(builder.prepare(dict(ctx)))
+    with pytest.raises(AttributeError):
+        prepared.foo = 1
+    with pytest.raises(TypeError):
+        prepared["biz_name"] = "Other"
+
+
+def test_context_fingerprint_is_stable_and_content_based():
+    from generator.context import context_fingerprint
+
+    a = {"biz_name": "A", "biz_serv": ["One", "Two"]}
+    b = {"biz_serv": ("One", "Two"), "biz_name": "A"}
+    assert context_fingerprint(a) == context_fingerprint(b)
+    assert context_fingerprint(a) != context_fingerprint(dict(a, biz_name="B"))
+    prepared = SiteBuilder().prepare(a)
+    assert prepared.digest == context_fingerprint(prepared.to_dict())
+
+
+def test_basic_pages_are_cleaned_for_directly_built_contexts():
+    from generator.context import PreparedContext
+
+    ctx = PreparedContext({"biz_name": "Raw Co", "privacy_html": "<script>x</script><p>Private</p>"})
+    entries = {e.name: e for e in SiteBuilder().iter_site_entries(ctx)}
+    html = entries["privacy.html"].data()
+    assert "<script>" not in html and "<p>Private</p>" in html
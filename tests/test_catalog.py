@@ -0,0 +1,98 @@
+import io
+import zipfile
+from generator.catalog import CatalogLayout
+from generator.context import PreparedContext
+from generator.export import iter_chunks
+from generator.feed import Product
+from generator.site_builder import SiteBuilder
+from generator.sitemap import sitemap_entries
+
+
+def catalog_context(n, **options):
+    builder = SiteBuilder()
+    ctx = builder.prepare({"biz_name": "Shop", "prod_url": "https://example.com/", **options}).to_dict()
+    ctx["products"] = [Product(f"Item {i}", f"{i}", "desc") for i in range(n)] + [Product("Item 0", "dup", "")]
+    return builder, PreparedContext(ctx)
+
+
+def test_large_catalog_is_paginated_with_detail_pages():
+    builder, ctx = catalog_context(24, home_products=5, products_per_page=10, product_pages=True)
+    home = builder.render_home(ctx)
+    assert home.count('class="product-card') == 5
+    assert 'href="inventory.html">View all 25 products' in home
+
+    buf = io.BytesIO()
+    builder.export(ctx, buf)
+    with zipfile.ZipFile(buf) as zf:
+        names = zf.namelist()
+        assert {"inventory.html", "inventory-2.html", "inventory-3.html"} <= set(names)
+        assert "product-item-0.html" in names and "product-item-0-2.html" in names
+        page3 = zf.read("inventory-3.html").decode("utf-8")
+        assert page3.count('class="product-card') == 5 and 'href="product-item-0-2.html"' in page3
+        detail = zf.read("product-item-13.html").decode("utf-8")
+        assert 'href="inventory-2.html"' in detail and "<title>Item 13 | Shop</title>" in detail
+        sitemap = zf.read("sitemap.xml").decode("utf-8")
+        assert sitemap.count("<url>") == 2 + 3 + 25 and "https://example.com/product-item-7.html" in sitemap
+
+
+def test_small_catalog_keeps_single_page_export():
+    builder, ctx = catalog_context(3)
+    assert builder.render_home(ctx).count('class="product-card') == 4
+    names = [e.name for e in builder.iter_site_entries(ctx)]
+    assert not any(n.startswith(("inventory", "product-")) for n in names)
+
+
+def test_detail_links_never_collide_with_suffixed_names():
+    builder = SiteBuilder()
+    ctx = builder.prepare({"biz_name": "Shop", "product_pages": True}).to_dict()
+    ctx["products"] = [Product("Rose", "1", ""), Product("Rose", "2", ""), Product("Rose 2", "3", "")]
+    ctx = PreparedContext(ctx)
+    links = CatalogLayout(ctx).links
+    assert links == ("product-rose.html", "product-rose-2.html", "product-rose-2-2.html")
+    names = [e.name for e in builder.iter_site_entries(ctx)]
+    assert len(names) == len(set(names))
+
+
+def test_zero_home_products_is_not_the_default():
+    builder, ctx = catalog_context(3, home_products=0)
+    layout = CatalogLayout(ctx)
+    assert layout.home == 0 and layout.pages == 1
+    assert CatalogLayout(PreparedContext(dict(ctx, home_products=""))).home > 0
+    home = builder.render_home(ctx)
+    assert home.count('class="product-card') == 0
+    assert "No products found" not in home and "View all 4 products" in home
+
+
+def test_sitemap_is_sharded_above_url_limit():
+    paths = [f"p{i}.html" for i in range(5)]
+    entries = sitemap_entries("https://example.com/a&b/", paths, max_urls=2)
+    assert [e.name for e in entries] == ["sitemap.xml", "sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml"]
+    index = b"".join(iter_chunks(entries[0].data)).decode("utf-8")
+    assert index.count("<sitemap>") == 3 and "https://example.com/a&amp;b/sitemap-3.xml" in index
+    last = b"".join(iter_chunks(entries[3].data)).decode("utf-8")
+    assert last.count("<url>") == 1 and last.endswith("</urlset>")
+
+
+def test_search_index_is_sharded_and_linked_from_pages():
+    import json
+    from generator.search import SearchIndex, tokenize
+
+    assert tokenize("Rosé Gold, 2 rings & a bracelet") == ["rosé", "gold", "2", "rings", "bracelet"]
+    builder, ctx = catalog_context(12, home_products=5, products_per_page=10, product_pages=True, product_search=True)
+    files = dict(SearchIndex(ctx["products"], shard_size=5).files())
+    manifest = json.loads(files["search/index.json"])
+    assert manifest["count"] == 13 and manifest["docs"] == ["search/docs-0.json", "search/docs-1.json", "search/docs-2.json"]
+    assert json.loads(files[manifest["terms"]["i"]])["item"] == list(range(13))
+    assert json.loads(files["search/docs-2.json"])[2][:2] == ["Item 0", "dup"]
+
+    buf = io.BytesIO()
+    builder.export(ctx, buf, minify=True)
+    with zipfile.ZipFile(buf) as zf:
+        names = zf.namelist()
+        script = next(n for n in names if n.startswith("search.") and n.endswith(".js"))
+        assert "search/index.json" in names and "search/terms-1.json" in names
+        for page in ("index.html", "inventory.html"):
+            html = zf.read(page).decode("utf-8")
+            assert f'src="{script}"' in html and 'data-index="search/index.json"' in html
+        docs = json.loads(zf.read("search/docs-0.json"))
+        assert docs[3][4] == "product-item-3.html" and docs[3][5] == 3.0
@@ -0,0 +1,75 @@
+import io
+import zipfile
+from generator.export import ArchiveEntry, write_archive
+from generator.site_builder import SiteBuilder
+
+CTX = {"biz_name": "Stream Co", "biz_serv": ["One", "Two"], "prod_url": "https://example.com"}
+
+
+class WriteOnlySink:
+    """A pipe-like sink: no seek/tell."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return b"".join(self.parts)
+
+
+def test_export_streams_to_non_seekable_sink():
+    sink = WriteOnlySink()
+    assert SiteBuilder().export(CTX, sink) == 8
+    with zipfile.ZipFile(io.BytesIO(sink.getvalue())) as zf:
+        assert "Stream Co" in zf.read("index.html").decode("utf-8")
+        assert zf.read("robots.txt").decode("utf-8").endswith("https://example.com/sitemap.xml")
+
+
+def test_export_is_byte_identical_for_identical_inputs():
+    first, second = io.BytesIO(), io.BytesIO()
+    builder = SiteBuilder()
+    builder.export(CTX, first)
+    builder.build_zip(dict(CTX), second)
+    assert first.getvalue() == second.getvalue()
+
+
+def test_entry_compression_follows_file_type():
+    buf = io.BytesIO()
+    entries = [
+        ArchiveEntry("img/hero.webp", b"RIFF....WEBP"),
+        ArchiveEntry("index.html", iter(["<p>", "chunked", "</p>"])),
+        ArchiveEntry("raw.html", "<p>x</p>", compress_type=zipfile.ZIP_STORED),
+    ]
+    write_archive(entries, buf, compresslevel=9)
+    with zipfile.ZipFile(buf) as zf:
+        types = {i.filename: i.compress_type for i in zf.infolist()}
+        assert zf.read("index.html") == b"<p>chunked</p>"
+        assert {i.date_time for i in zf.infolist()} == {(1980, 1, 1, 0, 0, 0)}
+    assert types == {"img/hero.webp": zipfile.ZIP_STORED, "index.html": zipfile.ZIP_DEFLATED, "raw.html": zipfile.ZIP_STORED}
+
+
+def test_shared_assets_export_links_one_fingerprinted_stylesheet():
+    ctx = dict(CTX, priv_body="<p>Secret clause</p>", p_color="#123456")
+    buf = io.BytesIO()
+    SiteBuilder().export(ctx, buf, shared_assets=True)
+    with zipfile.ZipFile(buf) as zf:
+        css_names = [n for n in zf.namelist() if n.startswith("styles.")]
+        assert len(css_names) == 1 and "--p: #123456" in zf.read(css_names[0]).decode("utf-8")
+        for page in ("index.html", "about.html"):
+            html = zf.read(page).decode("utf-8")
+            assert f'href="{css_names[0]}"' in html and "<style>" not in html
+            assert "Secret clause" not in html and "fetch(which + '.html')" in html
+        assert "Secret clause" in zf.read("privacy.html").decode("utf-8")
+
+    # Same styles -> same file name; a colour change -> a new one
+    again, changed = io.BytesIO(), io.BytesIO()
+    SiteBuilder().export(dict(ctx, biz_name="Other"), again, shared_assets=True)
+    SiteBuilder().export(dict(ctx, p_color="#654321"), changed, shared_assets=True)
+    assert css_names[0] in zipfile.ZipFile(again).namelist()
+    assert css_names[0] not in zipfile.ZipFile(changed).namelist()
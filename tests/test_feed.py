@@ -0,0 +1,75 @@
+from generator.feed import FeedReader, Product, ProductFeed
+
+
+def chunks(text, size):
+    data = text.encode("utf-8")
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_reads_pipe_feed_with_header_and_all_image_columns():
+    text = "Name|Price|Description|Img1|Img2|Img3\nRose|10|Red é|https://a/1.jpg|https://a/2.jpg|\nTulip|12|Yellow\n"
+    feed = FeedReader().read_chunks(chunks(text, 7))
+    assert [p.name for p in feed.products] == ["Rose", "Tulip"]
+    rose = feed.products[0]
+    assert rose.desc == "Red é"
+    assert rose.images == ("https://a/1.jpg", "https://a/2.jpg")
+    assert rose.img == "https://a/1.jpg"
+    assert feed.products[1].img == ""
+    assert feed.errors == () and not feed.truncated
+
+
+def test_headerless_feed_is_positional_and_quoted_newlines_survive():
+    feed = FeedReader().read_text('Rose,10,"Red\nand long",https://a/1.jpg\nTulip,12,Yellow\n')
+    assert [p.desc for p in feed.products] == ["Red\nand long", "Yellow"]
+
+
+def test_unrecognised_header_columns_fall_back_to_position():
+    feed = FeedReader().read_text("Name,MRP,About,Picture,Notes\nRose,10,Red,https://a/1.jpg,x\n")
+    rose = feed.products[0]
+    assert (rose.price, rose.desc, rose.images) == ("10", "Red", ("https://a/1.jpg",))
+    assert [str(e) for e in feed.errors] == [
+        "line 1: column 'MRP' read as price by position",
+        "line 1: column 'About' read as desc by position",
+        "line 1: column 'Picture' read as an image by position",
+        "line 1: ignored column 'Notes'",
+    ]
+
+
+def test_nameless_rows_and_relative_images_are_kept():
+    feed = FeedReader().read_text("Name,Price,Description,Img1\n,5,no name\nRose,10,Red,images/rose.jpg\n")
+    assert [p.name for p in feed.products] == ["", "Rose"]
+    assert feed.products[1].images == ("images/rose.jpg",)
+    assert feed.errors == ()
+
+
+def test_script_image_urls_are_reported():
+    feed = FeedReader().read_text("Name,Price,Description,Img1\nRose,10,Red, JavaScript:alert(1)\n")
+    assert feed.products[0].images == ()
+    assert [str(e) for e in feed.errors] == ["line 2: ignored script URL in an image column: JavaScript:alert(1)"]
+
+
+def test_row_and_byte_limits_truncate():
+    rows = "".join(f"Item {n},{n},desc\n" for n in range(100))
+    by_rows = FeedReader(max_rows=10).read_text(rows)
+    assert len(by_rows.products) == 10 and by_rows.truncated
+
+    consumed = []
+
+    def source():
+        for chunk in chunks(rows, 64):
+            consumed.append(chunk)
+            yield chunk
+
+    by_bytes = FeedReader(max_bytes=200).read_chunks(source())
+    assert by_bytes.truncated
+    assert 0 < len(by_bytes.products) < 20
+    assert all(p.name.startswith("Item ") and p.desc == "desc" for p in by_bytes.products)
+    assert sum(len(c) for c in consumed) <= 256
+
+
+def test_feed_round_trips_through_dict():
+    feed = FeedReader().read_text("Rose,10,Red,https://a/1.jpg\n,1,x\n")
+    restored = ProductFeed.from_dict(feed.to_dict())
+    assert restored.products == feed.products
+    assert [str(e) for e in restored.errors] == [str(e) for e in feed.errors]
+    assert isinstance(restored.products[0], Product)
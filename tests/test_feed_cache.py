@@ -0,0 +1,110 @@
+import pytest
+from generator.feed_cache import ProductFeedCache, normalize_sheet_url
+from generator.site_builder import SiteBuilder
+
+
+class FakeResponse:
+    def __init__(self, text="", status_code=200, headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.encoding = None
+
+    def iter_content(self, chunk_size=1):
+        data = self.text.encode("utf-8")
+        for i in range(0, len(data), chunk_size):
+            yield data[i : i + chunk_size]
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSheet:
+    """Serves a CSV body with an ETag and answers conditional requests with 304."""
+
+    def __init__(self, text, etag='"v1"'):
+        self.text = text
+        self.etag = etag
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.calls.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(status_code=304)
+        return FakeResponse(self.text, headers={"ETag": self.etag})
+
+
+CSV = "Name,Price,Description,Img1\nRose,10,Red,\nTulip,12,Yellow,\n"
+
+
+@pytest.fixture
+def sheet():
+    return FakeSheet(CSV)
+
+
+def test_normalize_sheet_url_converts_google_edit_links():
+    url = " https://docs.google.com/spreadsheets/d/abc/edit#gid=0 "
+    assert normalize_sheet_url(url) == "https://docs.google.com/spreadsheets/d/abc/export?format=csv"
+
+
+def test_fresh_entry_is_served_without_fetching(sheet):
+    builder = SiteBuilder(feed_cache=ProductFeedCache(ttl=60, client=sheet))
+    first = builder._fetch_products_from_sheet("https://example.com/feed.csv")
+    second = builder._fetch_products_from_sheet("https://example.com/feed.csv")
+    assert [p.name for p in first] == ["Rose", "Tulip"]
+    assert second is first
+    assert len(sheet.calls) == 1
+
+
+def test_stale_entry_is_revalidated_with_etag(sheet):
+    builder = SiteBuilder(feed_cache=ProductFeedCache(ttl=0, client=sheet))
+    first = builder._fetch_products_from_sheet("https://example.com/feed.csv")
+    second = builder._fetch_products_from_sheet("https://example.com/feed.csv")
+    assert second is first
+    assert sheet.calls[1] == {"If-None-Match": '"v1"'}
+
+    sheet.text, sheet.etag = "Name,Price\nLily,9\n", '"v2"'
+    third = builder._fetch_products_from_sheet("https://example.com/feed.csv")
+    assert [p.name for p in third] == ["Lily"]
+
+
+def test_stale_entry_is_served_when_revalidation_fails(sheet):
+    url = "https://example.com/feed.csv"
+    reader = SiteBuilder().feed_reader
+    cache = ProductFeedCache(ttl=0, client=sheet)
+    cache.get(url, reader.read_response)
+
+    def offline(url, headers=None, timeout=None, stream=False):
+        raise ConnectionError("sheet host unreachable")
+
+    sheet.get = offline
+    feed = cache.get(url, reader.read_response)
+    assert [p.name for p in feed.products] == ["Rose", "Tulip"]
+    assert "ConnectionError: sheet host unreachable" in str(feed.errors[-1])
+
+    # Without a cached copy the error still propagates
+    with pytest.raises(ConnectionError):
+        ProductFeedCache(ttl=0, client=sheet).get(url, reader.read_response)
+
+
+def test_entries_persist_across_cache_instances(sheet, tmp_path):
+    url = "https://example.com/feed.csv"
+    reader = SiteBuilder().feed_reader
+    ProductFeedCache(ttl=60, cache_dir=str(tmp_path), client=sheet).get(url, reader.read_response)
+    feed = ProductFeedCache(ttl=60, cache_dir=str(tmp_path), client=sheet).get(url, reader.read_response)
+    assert [p.name for p in feed.products] == ["Rose", "Tulip"]
+    assert len(sheet.calls) == 1
+
+
+def test_memory_cache_evicts_least_recently_used_feeds(sheet):
+    reader = SiteBuilder().feed_reader
+    cache = ProductFeedCache(ttl=60, client=sheet, max_entries=2)
+    for name in ("a", "b", "a", "c"):
+        cache.get(f"https://example.com/{name}.csv", reader.read_response)
+    assert list(cache._entries) == ["https://example.com/a.csv", "https://example.com/c.csv"]
+    assert set(cache._url_locks) <= set(cache._entries)
+    assert len(sheet.calls) == 3
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from generator.fetch import AsyncHttpClient, HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.05)
+            if self.path == "/flaky" and hits < 3:
+                status, body = 503, b"busy"
+            elif self.path == "/throttled" and hits < 2:
+                status, body = 429, b"later"
+            elif self.path == "/missing":
+                status, body = 404, b"nope"
+            else:
+                status, body = 200, self.path.encode("utf-8")
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "3600")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.hits, server.active, server.peak, server.lock = {}, 0, 0, threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = lambda path: f"http://127.0.0.1:{server.server_address[1]}{path}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_transient_errors_with_backoff(stub):
+    with HttpClient(backoff=0, retries=3) as client:
+        assert client.get_bytes(stub.url("/flaky")) == b"/flaky"
+        assert stub.hits["/flaky"] == 3
+        with pytest.raises(Exception):
+            client.get_bytes(stub.url("/missing"))
+        assert stub.hits["/missing"] == 1
+
+
+def test_retry_after_is_capped(stub):
+    with HttpClient(backoff=0, max_retry_after=0.05) as client:
+        started = time.perf_counter()
+        assert client.get_bytes(stub.url("/throttled")) == b"/throttled"
+    assert stub.hits["/throttled"] == 2 and time.perf_counter() - started < 5
+
+
+def test_async_fetch_all_is_bounded(stub):
+    client = AsyncHttpClient(HttpClient(backoff=0), max_concurrency=3)
+    urls = [stub.url(f"/slow/{n}") for n in range(9)] + [stub.url("/missing")]
+    results = asyncio.run(client.fetch_all(urls))
+    assert results[urls[0]] == b"/slow/0"
+    assert isinstance(results[stub.url("/missing")], Exception)
+    assert 1 < stub.peak <= 3
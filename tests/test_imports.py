@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Never needed to render from already-fetched data
+HEAVY = ("requests", "urllib3", "PIL", "streamlit", "brotli", "generator.fetch", "generator.feed_cache", "generator.assets")
+
+
+def loaded_after(code: str) -> list:
+    script = code + "\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def heavy(modules: list) -> list:
+    return [m for m in modules if m.split(".")[0] in HEAVY or m in HEAVY]
+
+
+def test_package_import_is_lazy():
+    modules = loaded_after("import generator")
+    assert "generator.site_builder" not in modules and "jinja2" not in modules
+
+
+def test_render_core_skips_network_imaging_and_ui():
+    modules = loaded_after(
+        "from generator import SiteBuilder\n"
+        "b = SiteBuilder()\n"
+        "b.render_home({'biz_name': 'Lean Co', 'biz_serv': ['One'], 'about_txt': 'Plain text'})\n"
+        "b.render_about({'biz_name': 'Lean Co'})\n"
+        "b.export({'biz_name': 'Lean Co'}, __import__('io').BytesIO())"
+    )
+    assert heavy(modules) == []
+    # Plain-text fields never reach bleach
+    assert "bleach" not in modules
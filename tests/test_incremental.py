@@ -0,0 +1,72 @@
+import os
+import json
+from generator.incremental import MANIFEST_NAME
+from generator.site_builder import SiteBuilder
+
+CTX = {"biz_name": "Delta Co", "biz_serv": ["One"], "prod_url": "https://example.com/", "priv_body": "<p>Private</p>"}
+
+
+class CountingBuilder(SiteBuilder):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.renders = []
+
+    def _render(self, name, ctx, **extra):
+        self.renders.append(name)
+        return super()._render(name, ctx, **extra)
+
+    def _generate(self, name, ctx, **extra):
+        self.renders.append(name)
+        return super()._generate(name, ctx, **extra)
+
+
+def test_second_build_renders_and_writes_nothing(tmp_path):
+    out = str(tmp_path / "site")
+    first = CountingBuilder().export_dir(CTX, out)
+    assert "index.html" in first.written and first.changed
+    mtime = os.stat(os.path.join(out, "index.html")).st_mtime_ns
+
+    builder = CountingBuilder()
+    second = builder.export_dir(dict(CTX), out)
+    assert builder.renders == []
+    assert second.written == [] and not second.changed
+    assert sorted(second.unchanged) == sorted(first.written)
+    assert os.stat(os.path.join(out, "index.html")).st_mtime_ns == mtime
+
+
+def test_only_affected_files_are_rewritten(tmp_path):
+    out = str(tmp_path / "site")
+    SiteBuilder().export_dir(CTX, out)
+    report = SiteBuilder().export_dir(dict(CTX, prod_url="https://example.org/"), out)
+    # prod_url feeds robots/sitemap and the page context, not the legal pages
+    assert {"robots.txt", "sitemap.xml"} <= set(report.written)
+    assert "privacy.html" in report.unchanged and "404.html" in report.unchanged
+
+
+def test_stale_files_are_pruned_and_missing_files_restored(tmp_path):
+    out = str(tmp_path / "site")
+    SiteBuilder().export_dir(CTX, out, precompress=True)
+    assert os.path.exists(os.path.join(out, "index.html.gz"))
+    os.remove(os.path.join(out, "about.html"))
+
+    report = SiteBuilder().export_dir(CTX, out)
+    assert "about.html" in report.written
+    assert "index.html.gz" in report.removed
+    assert not os.path.exists(os.path.join(out, "index.html.gz"))
+    with open(os.path.join(out, MANIFEST_NAME), encoding="utf-8") as fh:
+        assert "index.html.gz" not in json.load(fh)["files"]
+
+
+def test_exported_files_get_regular_permissions(tmp_path):
+    out = str(tmp_path / "site")
+    old = os.umask(0o022)
+    try:
+        from generator import incremental
+
+        incremental._FILE_MODE.clear()
+        SiteBuilder().export_dir(CTX, out)
+    finally:
+        os.umask(old)
+        incremental._FILE_MODE.clear()
+    for name in ("index.html", "robots.txt", MANIFEST_NAME):
+        assert os.stat(os.path.join(out, name)).st_mode & 0o777 == 0o644
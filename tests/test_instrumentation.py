@@ -0,0 +1,23 @@
+import io
+from generator.instrumentation import MemoryCollector
+from generator.site_builder import SiteBuilder
+
+
+def test_builder_reports_stage_timings_and_sizes():
+    stats = MemoryCollector()
+    builder = SiteBuilder(collector=stats)
+    buf = io.BytesIO()
+    builder.build_zip({"biz_name": "Timed Café", "priv_body": "<p>Privacy</p>"}, buf)
+
+    stages = {row["stage"]: row for row in stats.summary()}
+    assert stages["sanitize"]["count"] == 1
+    assert "feed.fetch" not in stages  # no sheet_url
+    assert stages["render:index.html.j2"]["bytes_out"] > 0
+    assert stages["render:about.html.j2"]["count"] == 1
+    assert stages["archive:index.html"]["bytes_in"] == stages["render:index.html.j2"]["bytes_out"]
+    assert stages["export"]["entries"] == 8
+    assert stages["export"]["bytes_out"] < stages["export"]["bytes_in"]
+    assert all(row["seconds"] >= 0 for row in stats.summary())
+
+    stats.reset()
+    assert stats.summary() == []
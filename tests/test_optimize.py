@@ -0,0 +1,72 @@
+import gzip
+import io
+import re
+import zipfile
+from generator.optimize import minify_css, minify_html, minify_js, optimize_entries, precompress
+from generator.export import ArchiveEntry
+from generator.site_builder import SiteBuilder
+
+
+def test_minify_html_keeps_raw_blocks_and_inline_spacing():
+    html = """<div>
+        <p>Hello   <b>bold</b> <i>world</i></p>
+        <!-- note -->
+        <pre>  keep
+   this  </pre>
+    </div>"""
+    assert minify_html(html) == "<div><p>Hello <b>bold</b> <i>world</i></p><pre>  keep\n   this  </pre></div>"
+
+
+def test_minify_js_leaves_literals_alone():
+    js = """
+    // comment
+    const a = `line
+        two // not a comment ${ "x" }`;   /* block */
+    const b = 'it''s' + "http://x";
+    const r = /\\/\\/+/g;
+    """
+    assert minify_js(js) == 'const a = `line\n        two // not a comment ${ "x" }`;\nconst b = \'it\'\'s\' + "http://x";\nconst r = /\\/\\/+/g;'
+
+
+def test_minify_css():
+    # Spaces before ":" are kept: they are significant in selectors ("a :hover")
+    css = """/* c */ .a , .b > .c { color: red ; font-family: "Open  Sans", x; }
+    a :hover { margin: 0 }"""
+    assert minify_css(css) == '.a,.b>.c{color:red;font-family:"Open  Sans",x}a :hover{margin:0}'
+
+
+def test_export_minifies_pages_and_adds_gzip_siblings():
+    legal = "<p>First line\nSecond `quoted` line</p>"
+    ctx = {"biz_name": "Min Co", "priv_body": legal, "biz_serv": ["One", "Two"]}
+    builder = SiteBuilder()
+    plain = builder.render_home(ctx)
+    buf = io.BytesIO()
+    builder.build_zip(ctx, buf, minify=True, precompress=True)
+    with zipfile.ZipFile(buf) as zf:
+        index = zf.read("index.html")
+        assert gzip.decompress(zf.read("index.html.gz")) == index
+        assert zf.getinfo("index.html.gz").compress_type == zipfile.ZIP_STORED
+    index = index.decode("utf-8")
+    assert len(index) < len(plain)
+    literal = re.compile(r"const privacyHtml = `.*?`;", re.DOTALL)
+    assert literal.search(index).group(0) == literal.search(plain).group(0)
+
+
+def test_minified_product_page_keeps_description_line_breaks():
+    from generator.context import PreparedContext
+    from generator.feed import Product
+
+    builder = SiteBuilder()
+    ctx = builder.prepare({"biz_name": "Min Co", "product_pages": True}).to_dict()
+    ctx["products"] = [Product("Rose", "10", "Line one\n   Line two")]
+    buf = io.BytesIO()
+    builder.export(PreparedContext(ctx), buf, minify=True)
+    with zipfile.ZipFile(buf) as zf:
+        page = zf.read("product-rose.html").decode("utf-8")
+    assert "Line one\nLine two" in page
+
+
+def test_small_and_binary_entries_pass_through():
+    entries = list(optimize_entries([ArchiveEntry("a.txt", "tiny"), ArchiveEntry("x.webp", b"RIFF")]))
+    assert [e.name for e in entries] == ["a.txt", "x.webp"]
+    assert set(precompress(b"x" * 1000, formats=("gz",))) == {"gz"}
@@ -0,0 +1,48 @@
+import bleach
+import threading
+from generator.sanitizer import ALLOWED_ATTRS, ALLOWED_TAGS, Sanitizer, clean_html
+
+SAMPLES = [
+    "Plain service name",
+    'Quotes "double" and \'single\'',
+    "Line\r\nbreaks and\ttabs",
+    "Ctrl\x00\x01\x0cchars",
+    "Fish & Chips <b>bold</b> <script>alert(1)</script>",
+    '<a href="javascript:alert(1)" onclick="x()">link</a>',
+    "ünïcödé ✓ 😀",
+]
+
+
+def test_matches_bleach_for_plain_and_markup_text():
+    s = Sanitizer()
+    for value in SAMPLES:
+        expected = bleach.clean(value, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS, strip=True)
+        assert s.clean(value) == expected
+        assert s.clean(value) == expected  # served from the cache the second time
+
+
+def test_plain_text_skips_cache_and_markup_is_cached():
+    s = Sanitizer(cache_size=2)
+    assert s.clean("Wedding planning") == "Wedding planning"
+    assert s.cache_info()["size"] == 0
+    for value in ("<b>a</b>", "<b>b</b>", "<b>c</b>", "<b>c</b>"):
+        s.clean(value)
+    info = s.cache_info()
+    assert info["size"] == 2 and info["hits"] == 1 and info["misses"] == 3
+
+
+def test_clean_many_and_threads():
+    s = Sanitizer()
+    values = ["<i>x</i>", "Plain", "<i>x</i>", "<script>y</script>z"] * 50
+    expected = [clean_html(v) for v in values]
+    results = []
+
+    def work():
+        results.append(s.clean_many(values))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [expected] * 4
@@ -0,0 +1,95 @@
+import io
+import os
+import json
+import threading
+import zipfile
+import urllib.request
+import urllib.error
+import pytest
+from generator.service import RenderService, make_server
+
+CTX = {"biz_name": "Service Co", "biz_serv": ["One"], "prod_url": "https://example.com/"}
+
+
+@pytest.fixture
+def server():
+    service = RenderService(workers=1, queue=0, queue_timeout=0.1)
+    httpd = make_server(service, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = lambda path: f"http://127.0.0.1:{httpd.server_address[1]}{path}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def post(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), method="POST")
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return resp.status, resp.headers, resp.read()
+
+
+def test_render_zip_and_metrics(server):
+    status, headers, body = post(server.url("/render"), CTX)
+    assert status == 200 and "Service Co" in body.decode("utf-8")
+
+    status, headers, body = post(server.url("/zip?minify=1"), CTX)
+    assert headers["Content-Type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        assert "index.html" in zf.namelist()
+
+    with urllib.request.urlopen(server.url("/metrics"), timeout=10) as resp:
+        metrics = json.loads(resp.read())
+    assert metrics["counters"]["requests"] == 2 and metrics["counters"]["errors"] == 0
+    assert any(row["stage"] == "render:index.html.j2" for row in metrics["stages"])
+
+
+def test_bad_requests_are_rejected(server):
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        post(server.url("/render"), ["not", "an", "object"])
+    assert exc.value.code == 400
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        post(server.url("/render?page=nope"), CTX)
+    assert exc.value.code == 400
+
+
+def test_full_queue_returns_503(server):
+    service = server.RequestHandlerClass.service
+    with service.slot():
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            post(server.url("/render"), CTX)
+    assert exc.value.code == 503 and exc.value.headers["Retry-After"] == "1"
+    assert service.metrics()["counters"]["rejected"] == 1
+    with urllib.request.urlopen(server.url("/healthz"), timeout=10) as resp:
+        assert json.loads(resp.read())["status"] == "ok"
+
+
+def test_connection_limit_returns_503():
+    service = RenderService(workers=1, queue=0, max_connections=1)
+    httpd = make_server(service, port=0)
+    try:
+        # Hold the only connection slot, as a slow client would
+        httpd._connections.acquire()
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_address[1]}/healthz", timeout=10)
+        assert exc.value.code == 503
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        service.close()
+
+
+def test_dead_worker_process_is_replaced():
+    from concurrent.futures.process import BrokenProcessPool
+
+    service = RenderService(workers=1, queue=0)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            service._submit(os._exit, 1)
+        assert "Service Co" in service.render(CTX)
+        assert service.health()["status"] == "ok" and service.health()["pool_restarts"] == 1
+    finally:
+        service.close()
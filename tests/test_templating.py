@@ -0,0 +1,20 @@
+import os
+from generator.site_builder import SiteBuilder
+from generator.templating import compile_templates, create_environment
+
+
+def test_compiled_templates_render_without_sources(tmp_path):
+    target = compile_templates(str(tmp_path / "compiled"))
+    assert any(name.endswith(".py") for name in os.listdir(target))
+
+    env = create_environment(templates_path=None, compiled_path=target, auto_reload=False)
+    html = SiteBuilder(template_env=env).render_home({"biz_name": "Compiled Co", "biz_serv": ["One"]})
+    assert "Compiled Co" in html
+
+
+def test_bytecode_cache_is_written_and_templates_are_pinned(tmp_path):
+    cache_dir = tmp_path / "bcc"
+    builder = SiteBuilder(template_env=create_environment(bytecode_cache_dir=str(cache_dir), auto_reload=False))
+    builder.render_home({"biz_name": "Cached Co"})
+    assert os.listdir(cache_dir)
+    assert builder._template("index.html.j2") is builder._template("index.html.j2")